@@ -1,14 +1,72 @@
-import requests
+import atexit
+import functools
+import heapq
 import json
 import os
 import random
 import re
-from datetime import datetime, timedelta, date
-from typing import Optional, List, Dict, Tuple
+import sqlite3
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, date
+from typing import Optional, List, Dict, Tuple, Iterable
 
-FILE_NAME = "vocab.json"
+try:
+    import orjson  # Optional: much faster (de)serialization than json
+except ImportError:
+    orjson = None
+
+DB_FILE = "vocab.db"
+FILE_NAME = "vocab.json"  # Legacy vocab storage, migrated into DB_FILE
 PROGRESS_FILE = "progress.json"
 STATS_FILE = "stats.json"
+REVIEW_LOG_FILE = "session.wal"  # Answers of the running session, replayed after a crash
+
+# Review log entries kept per word; build_study_plan only reads the last 5.
+# Must stay below 64: the stored correct flags are one SQLite integer
+MAX_HISTORY = 20
+
+# Bump when vocab storage changes; kept as the database's user_version
+# 2: all fields present, 3: moved from vocab.json into SQLite,
+# 4: review history packed into the words row
+VOCAB_SCHEMA_VERSION = 4
+
+_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    word TEXT PRIMARY KEY,
+    sentence TEXT NOT NULL,
+    note TEXT NOT NULL,
+    blanked TEXT NOT NULL,
+    box INTEGER NOT NULL,
+    times_reviewed INTEGER NOT NULL,
+    times_correct INTEGER NOT NULL,
+    ease REAL NOT NULL,
+    last_reviewed TEXT,
+    next_review TEXT,
+    interval INTEGER NOT NULL,
+    history_days BLOB NOT NULL DEFAULT x'',
+    history_correct INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# words table columns and the value stored when an entry lacks the field
+_WORD_COLUMNS = {
+    "sentence": "",
+    "note": "",
+    "blanked": "",
+    "box": 1,
+    "times_reviewed": 0,
+    "times_correct": 0,
+    "ease": 2.5,
+    "last_reviewed": None,
+    "next_review": None,
+    "interval": 1
+}
 
 # Spaced repetition intervals (days)
 REVIEW_INTERVALS = {
@@ -18,10 +76,267 @@ REVIEW_INTERVALS = {
     4: 14    # Easy: 2 weeks
 }
 
+# SM-2 ease change per rating q (1-4), tabulated from the formula
+# EF' = EF + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+_EASE_DELTA = {q: 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02) for q in range(1, 5)}
+
+# Memory box move per rating: failed/hard drop a box, good/easy climb one
+_BOX_DELTA = {1: -1, 2: -1, 3: 1, 4: 1}
+
+# Today's date as (ordinal, "YYYY-MM-DD"), reformatted only on day rollover
+_today_cache = {"ordinal": None, "str": None}
+
+def _today_ordinal() -> int:
+    """Today's date as a proleptic Gregorian ordinal."""
+    ordinal = date.today().toordinal()
+    if ordinal != _today_cache["ordinal"]:
+        _today_cache["ordinal"] = ordinal
+        _today_cache["str"] = date.fromordinal(ordinal).isoformat()
+    return ordinal
+
+def _today_str() -> str:
+    """Today's date formatted as YYYY-MM-DD."""
+    _today_ordinal()
+    return _today_cache["str"]
+
+
+# ==================================================
+# CHANGE TRACKING
+# ==================================================
+
+# Bumped on every vocab change; derived indexes rebuild when it moves
+vocab_version = 0
+
+def _touch_vocab() -> None:
+    """Invalidate every index derived from vocab."""
+    global vocab_version
+    vocab_version += 1
+
+# Bumped by save_progress, which every progress change is followed by
+progress_version = 0
+
+class _VocabDict(dict):
+    """
+    Word -> data mapping that keeps a lowercase key index, running
+    review totals and per-box word counts, and bumps vocab_version
+    whenever words come and go.
+
+    It also records which words changed since the last save so only
+    those rows are written. Code that edits an entry in place must call
+    touch(word); review counters must be changed through record_answer
+    and boxes through schedule_next_review/schedule_batch.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.schema_version = VOCAB_SCHEMA_VERSION
+        self._lower_keys = {word.lower(): word for word in self}
+        self.total_reviewed = sum(d.get("times_reviewed", 0) for d in self.values())
+        self.total_correct = sum(d.get("times_correct", 0) for d in self.values())
+        self.box_counts = Counter(d.get("box", 1) for d in self.values())
+        self._changed_words = set()
+        self._removed_words = set()
+        self._search_texts = {}
+        self._display_fields = {}
+        _touch_vocab()
+
+    def _on_add(self, key, value):
+        self._lower_keys[key.lower()] = key
+        self.total_reviewed += value.get("times_reviewed", 0)
+        self.total_correct += value.get("times_correct", 0)
+        self.box_counts[value.get("box", 1)] += 1
+        self._changed_words.add(key)
+        self._removed_words.discard(key)
+        self._forget_fields(key)
+        _touch_vocab()
+
+    def _on_remove(self, key, value):
+        if self._lower_keys.get(key.lower()) == key:
+            del self._lower_keys[key.lower()]
+        self.total_reviewed -= value.get("times_reviewed", 0)
+        self.total_correct -= value.get("times_correct", 0)
+        self.box_counts[value.get("box", 1)] -= 1
+        self._changed_words.discard(key)
+        self._removed_words.add(key)
+        self._forget_fields(key)
+        _touch_vocab()
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self._on_remove(key, self[key])
+        super().__setitem__(key, value)
+        self._on_add(key, value)
+
+    def __delitem__(self, key):
+        value = self[key]
+        super().__delitem__(key)
+        self._on_remove(key, value)
+
+    def clear(self):
+        self._removed_words.update(self)
+        self._changed_words.clear()
+        super().clear()
+        self._lower_keys.clear()
+        self._search_texts.clear()
+        self._display_fields.clear()
+        self.total_reviewed = 0
+        self.total_correct = 0
+        self.box_counts.clear()
+        _touch_vocab()
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._on_remove(key, value)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_remove(key, value)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def find(self, word: str) -> Optional[str]:
+        """Return the stored spelling of word, matched case-insensitively."""
+        return self._lower_keys.get(word.lower())
+
+    def search_text(self, word: str) -> str:
+        """
+        Lowercased word, sentence and note joined by NUL, cached until the
+        entry changes; one substring test searches all three fields.
+        """
+        text = self._search_texts.get(word)
+        if text is None:
+            data = self[word]
+            text = f"{word}\0{data.get('sentence', '')}\0{data.get('note', '')}".lower()
+            self._search_texts[word] = text
+        return text
+
+    def display_fields(self, word: str) -> Tuple[str, str]:
+        """(sentence, note) shortened for the word table, cached until the entry changes."""
+        fields = self._display_fields.get(word)
+        if fields is None:
+            data = self[word]
+            sentence, note = data.get("sentence", ""), data.get("note", "")
+            fields = (sentence[:40] + "..." if len(sentence) > 40 else sentence,
+                      note[:20] + "..." if len(note) > 20 else note)
+            self._display_fields[word] = fields
+        return fields
+
+    def _forget_fields(self, word: str) -> None:
+        """Drop the cached search text and display fields of word."""
+        self._search_texts.pop(word, None)
+        self._display_fields.pop(word, None)
+
+    def touch(self, *words: str) -> None:
+        """Mark entries edited in place as changed."""
+        self._changed_words.update(words)
+        for word in words:
+            self._forget_fields(word)
+        _touch_vocab()
+
+    def take_changes(self) -> Tuple[set, set]:
+        """Return (changed, removed) words since the last call and reset them."""
+        changed, removed = self._changed_words, self._removed_words
+        self._changed_words, self._removed_words = set(), set()
+        return changed, removed
+
+    def restore_changes(self, changed: set, removed: set) -> None:
+        """Put back changes from take_changes that failed to save."""
+        # Words changed or removed again since then already carry their newer state
+        self._changed_words.update(w for w in changed if w in self)
+        self._removed_words.update(w for w in removed if w not in self)
+
+
+# ==================================================
+# LAZY DATA LOADING
+# ==================================================
+
+# vocab, progress and stats are module globals created on first use, so
+# importing core does not parse the data files
+_data_loaded = False
+
+def _load_data() -> None:
+    """Load vocab, progress and stats and bring vocab up to date."""
+    global progress, vocab, stats, _data_loaded
+    progress = load_progress()
+    vocab = load_vocab()
+    stats = load_stats()
+    _data_loaded = True
+    upgrade_vocab_schema()
+
+def __getattr__(name: str):
+    """Load the data on first access to core.vocab/progress/stats (PEP 562)."""
+    if name in ("vocab", "progress", "stats"):
+        _load_data()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _uses_data(func):
+    """Make sure the data is loaded before func runs."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _data_loaded:
+            _load_data()
+        return func(*args, **kwargs)
+    return wrapper
+
+
 # ==================================================
 # FILE MANAGEMENT
 # ==================================================
 
+def _read_json(path: str):
+    """Parse a JSON data file."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def _file_mode(path: str) -> int:
+    """Permission bits of path, or those a new file gets under the umask."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def _write_json(path: str, obj, indent: bool = True) -> None:
+    """
+    Serialize obj to path atomically; indent=False writes the compact form.
+
+    The data goes to a temporary file in the same directory that is
+    synced to disk and then replaces path, so neither a crash nor a power
+    loss mid-write leaves a truncated file.
+    """
+    if orjson:
+        raw = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    else:
+        raw = json.dumps(obj, indent=2 if indent else None,
+                         separators=None if indent else (",", ":")).encode()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the mode path has (or would get)
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 def load_progress() -> Dict:
     """Load progress data with defaults."""
     if not os.path.exists(PROGRESS_FILE):
@@ -29,71 +344,318 @@ def load_progress() -> Dict:
             "current_streak": 0,
             "longest_streak": 0,
             "last_study_date": None,
-            "achievements": [],
+            "achievements": set(),
             "total_reviews": 0,
             "studied_today": 0,
             "xp": 0,
             "history": {}
         }
-    with open(PROGRESS_FILE, "r") as f:
-        data = json.load(f)
-        # Ensure all required fields exist
-        data.setdefault("achievements", [])
-        data.setdefault("total_reviews", 0)
-        data.setdefault("studied_today", 0)
-        data.setdefault("xp", 0)
-        data.setdefault("history", {})
-        return data
+    data = _read_json(PROGRESS_FILE)
+    # Ensure all required fields exist
+    # Achievements are a set in memory and a list on disk
+    data["achievements"] = set(data.get("achievements", []))
+    data.setdefault("total_reviews", 0)
+    data.setdefault("studied_today", 0)
+    data.setdefault("xp", 0)
+    data.setdefault("history", {})
+    return data
 
+@_uses_data
 def save_progress() -> None:
-    """Save progress to file."""
-    with open(PROGRESS_FILE, "w") as f:
-        json.dump(progress, f, indent=4)
+    """Save progress to file (deferred inside batched_writes)."""
+    global progress_version
+    progress_version += 1
+    _request_save("progress")
+
+def _write_progress() -> None:
+    _write_json(PROGRESS_FILE, {**progress, "achievements": sorted(progress["achievements"])})
+
+# Connection to DB_FILE, opened on first use and shared by loads and saves
+_db = None
+
+def _connect() -> sqlite3.Connection:
+    """Return the vocabulary database connection, creating its tables if needed."""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DB_FILE)
+        # WAL commits append to a log instead of rewriting pages in place
+        _db.execute("PRAGMA journal_mode = WAL")
+        _db.execute("PRAGMA synchronous = NORMAL")
+        _db.executescript(_DB_SCHEMA)
+    return _db
+
+def close_db() -> None:
+    """Close the database connection; the next load or save reopens it."""
+    global _db
+    if _db is not None:
+        _db.close()
+        _db = None
+
+# Registered before flush_writes, so it runs after the final flush
+atexit.register(close_db)
+
+def _pack_history(history: List[Dict]) -> Tuple[bytes, int]:
+    """
+    Pack a review history into (day ordinals as little-endian int32s,
+    bitmask of correct answers with bit i for review i).
+    """
+    history = history[-MAX_HISTORY:]
+    days = array("i", (date.fromisoformat(h["date"]).toordinal() for h in history))
+    if sys.byteorder == "big":
+        days.byteswap()
+    correct = 0
+    for i, h in enumerate(history):
+        if h.get("correct", True):
+            correct |= 1 << i
+    return days.tobytes(), correct
+
+def _unpack_history(days_blob: bytes, correct: int) -> List[Dict]:
+    """Inverse of _pack_history."""
+    days = array("i")
+    days.frombytes(days_blob)
+    if sys.byteorder == "big":
+        days.byteswap()
+    return [{"date": date.fromordinal(day).isoformat(), "correct": bool(correct >> i & 1)}
+            for i, day in enumerate(days)]
+
+def _migrate_reviews_table(conn: sqlite3.Connection) -> None:
+    """Move a version 3 database's reviews table into the packed history columns."""
+    histories = {}
+    for word, day, correct in conn.execute("SELECT word, date, correct FROM reviews ORDER BY id"):
+        histories.setdefault(word, []).append({"date": day, "correct": bool(correct)})
+    # Packed before the schema is touched, so bad rows fail with no change made
+    packed = [(*_pack_history(history), word) for word, history in histories.items()]
+    # Columns may already exist if an older, non-transactional migration was interrupted
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(words)")}
+    # sqlite3 does not wrap DDL in a transaction by itself: open one explicitly
+    # so the whole migration is applied or none of it
+    conn.execute("BEGIN")
+    try:
+        if "history_days" not in columns:
+            conn.execute("ALTER TABLE words ADD COLUMN history_days BLOB NOT NULL DEFAULT x''")
+        if "history_correct" not in columns:
+            conn.execute("ALTER TABLE words ADD COLUMN history_correct INTEGER NOT NULL DEFAULT 0")
+        conn.executemany("UPDATE words SET history_days = ?, history_correct = ? WHERE word = ?", packed)
+        conn.execute("DROP TABLE reviews")
+        conn.execute("PRAGMA user_version = 4")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _load_vocab_db() -> Dict:
+    conn = _connect()
+    if conn.execute("PRAGMA user_version").fetchone()[0] == 3:
+        _migrate_reviews_table(conn)
+    columns = ", ".join(_WORD_COLUMNS)
+    entries = {}
+    for row in conn.execute(f"SELECT word, {columns}, history_days, history_correct FROM words"):
+        # NULL columns (e.g. last_reviewed) are simply left out
+        data = {col: value for col, value in zip(_WORD_COLUMNS, row[1:-2]) if value is not None}
+        data["history"] = _unpack_history(row[-2], row[-1])
+        entries[row[0]] = data
+    loaded = _VocabDict(entries)
+    loaded.schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    return loaded
 
 def load_vocab() -> Dict:
     """Load vocabulary database."""
-    if not os.path.exists(FILE_NAME):
-        return {}
-    with open(FILE_NAME, "r") as f:
-        return json.load(f)
+    if os.path.exists(DB_FILE):
+        loaded = _load_vocab_db()
+        # Every save stamps the version, so a version 0 database is one whose
+        # first import from FILE_NAME never committed: import it again
+        if loaded.schema_version or not os.path.exists(FILE_NAME):
+            return loaded
+    elif not os.path.exists(FILE_NAME):
+        return _VocabDict()
+    # Legacy JSON storage; upgrade_vocab_schema moves it into the database
+    data = _read_json(FILE_NAME)
+    # Files written before versioning carry no tag
+    schema_version = data.pop("_schema_version", 1)
+    loaded = _VocabDict(data)
+    loaded.schema_version = schema_version
+    return loaded
 
+@_uses_data
 def save_vocab() -> None:
-    """Save vocabulary to file."""
-    with open(FILE_NAME, "w") as f:
-        json.dump(vocab, f, indent=4)
+    """Save vocabulary to file (deferred inside batched_writes)."""
+    _request_save("vocab")
+
+def _write_vocab() -> None:
+    """Write the words changed since the last save in one transaction."""
+    changed, removed = vocab.take_changes()
+    try:
+        conn = _connect()
+        with conn:
+            conn.executemany("DELETE FROM words WHERE word = ?", [(w,) for w in removed])
+            placeholders = ", ".join("?" * (len(_WORD_COLUMNS) + 3))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO words (word, {', '.join(_WORD_COLUMNS)}, history_days, history_correct) "
+                f"VALUES ({placeholders})",
+                [(w, *(vocab[w].get(col, default) for col, default in _WORD_COLUMNS.items()),
+                  *_pack_history(vocab[w].get("history", [])))
+                 for w in changed]
+            )
+            conn.execute(f"PRAGMA user_version = {int(vocab.schema_version)}")
+    except BaseException:
+        # e.g. database locked or disk full: keep the words for the next save
+        vocab.restore_changes(changed, removed)
+        raise
 
 def load_stats() -> Dict:
     """Load statistics."""
-    if not os.path.exists(STATS_FILE):
-        return {
-            "words_added": 0,
-            "words_removed": 0,
-            "quiz_attempts": 0,
-            "quiz_correct": 0
-        }
-    with open(STATS_FILE, "r") as f:
-        return json.load(f)
+    data = _read_json(STATS_FILE) if os.path.exists(STATS_FILE) else {}
+    # Ensure all counters exist so callers can increment them directly
+    for key in ("words_added", "words_removed", "quiz_attempts", "quiz_correct"):
+        data.setdefault(key, 0)
+    return data
 
+@_uses_data
 def save_stats() -> None:
-    """Save statistics."""
-    with open(STATS_FILE, "w") as f:
-        json.dump(stats, f, indent=4)
+    """Save statistics (deferred inside batched_writes)."""
+    _request_save("stats")
+
+def _write_stats() -> None:
+    _write_json(STATS_FILE, stats)
+
+
+# ==================================================
+# BATCHED WRITES
+# ==================================================
+
+_WRITERS = {
+    "vocab": _write_vocab,
+    "progress": _write_progress,
+    "stats": _write_stats
+}
+
+# Saves requested while a batch is open are only recorded here
+_batch_depth = 0
+_pending_saves = set()
+
+def _request_save(name: str) -> None:
+    """Write a data file now, or mark it pending if a batch is open."""
+    if _batch_depth:
+        _pending_saves.add(name)
+    else:
+        try:
+            _WRITERS[name]()
+        except BaseException:
+            # Retried by the next flush, at the latest on exit
+            _pending_saves.add(name)
+            raise
+
+def _defer_save(name: str) -> None:
+    """Mark a data file pending without writing it; the next flush saves it."""
+    _pending_saves.add(name)
+
+def flush_writes() -> None:
+    """Write every data file that has a pending save."""
+    while _pending_saves:
+        name = next(iter(_pending_saves))
+        _WRITERS[name]()
+        # Dropped only once written, so a failed write stays pending
+        _pending_saves.discard(name)
+
+@contextmanager
+def batched_writes():
+    """
+    Group saves so each data file is written at most once.
+
+    Inside the block save_vocab/save_progress/save_stats only mark their
+    file as pending; the outermost block flushes them on exit. Batches
+    may be nested.
+    """
+    global _batch_depth
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+        if not _batch_depth:
+            flush_writes()
+
+# Never lose a pending save if the process exits mid-batch
+atexit.register(flush_writes)
+
+
+# ==================================================
+# REVIEW LOG
+# ==================================================
+
+# A study session defers its saves to the end, so each rated answer is
+# also appended here; if the app dies mid-session the log is replayed
+# on the next start
+
+def log_review(word: str, is_correct: bool, rating: int, day: str) -> None:
+    """Append one rated answer, given on day (YYYY-MM-DD), to the review log."""
+    with open(REVIEW_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{day}\t{int(is_correct)}\t{rating}\t{word}\n")
+
+def clear_review_log() -> None:
+    """
+    Drop the review log; done right before the session's changes are
+    flushed, so a crash after the flush cannot replay them a second time.
+    """
+    try:
+        os.remove(REVIEW_LOG_FILE)
+    except FileNotFoundError:
+        pass
+
+def _clear_review_log_at_exit() -> None:
+    """Drop the review log if the exit flush is about to save an open batch."""
+    if _batch_depth:
+        clear_review_log()
+
+# Registered after flush_writes, so it runs before the exit flush: the
+# answers of a session cut short by Ctrl+C or an uncaught exception are
+# then saved once, not saved and replayed again on the next start
+atexit.register(_clear_review_log_at_exit)
+
+@_uses_data
+def replay_review_log() -> int:
+    """Apply answers left in the review log by an unfinished session."""
+    try:
+        with open(REVIEW_LOG_FILE, encoding="utf-8") as f:
+            # The last piece is "" or a line torn by the crash
+            lines = f.read().split("\n")[:-1]
+    except FileNotFoundError:
+        return 0
+    
+    ratings = []
+    with batched_writes():
+        for line in lines:
+            day, is_correct, rating, word = line.split("\t", 3)
+            record_answer(word, is_correct == "1", day)
+            ratings.append((word, int(rating)))
+        schedule_batch(ratings)
+    clear_review_log()
+    return len(ratings)
 
-# Initialize data
-progress = load_progress()
-vocab = load_vocab()
-stats = load_stats()
 
 
 # ==================================================
 # VOCABULARY SCHEMA MANAGEMENT
 # ==================================================
 
+@functools.lru_cache(maxsize=4096)
+def _word_pattern(word: str) -> re.Pattern:
+    """Compiled case-insensitive pattern matching word literally."""
+    return re.compile(re.escape(word), re.IGNORECASE)
+
+@functools.lru_cache(maxsize=4096)
+def blank_sentence(word: str, sentence: str, blank: str = "_____") -> str:
+    """Replace every occurrence of word in sentence (any case) with blank."""
+    return _word_pattern(word).sub(lambda _: blank, sentence)
+
+@_uses_data
 def upgrade_vocab_schema() -> None:
     """Migrate old vocab entries to new schema."""
-    updated = False
-    for word, data in vocab.items():
-        # Ensure all fields exist
+    if vocab.schema_version == VOCAB_SCHEMA_VERSION:
+        return
+    
+    if vocab.schema_version < 2:
+        # Built once so every migrated word gets the same review date
         defaults = {
             "sentence": "",
             "note": "",
@@ -101,26 +663,30 @@ def upgrade_vocab_schema() -> None:
             "times_reviewed": 0,
             "times_correct": 0,
             "ease": 2.5,
-            "history": [],
             "last_reviewed": None,
-            "next_review": datetime.now().strftime("%Y-%m-%d"),
+            "next_review": _today_str(),
             "interval": 1
         }
-        for key, default in defaults.items():
-            if key not in data:
-                data[key] = default
-                updated = True
+        for word, data in vocab.items():
+            # Ensure all fields exist
+            for key, default in defaults.items():
+                data.setdefault(key, default)
+            data.setdefault("history", [])
+            if "blanked" not in data:
+                data["blanked"] = blank_sentence(word, data["sentence"])
     
-    if updated:
-        save_vocab()
+    # Versions 3+ keep vocab in SQLite: write every word into the database
+    vocab.schema_version = VOCAB_SCHEMA_VERSION
+    vocab.touch(*vocab)
+    save_vocab()
 
-upgrade_vocab_schema()
 
 
 # ==================================================
 # WORD MANAGEMENT
 # ==================================================
 
+@_uses_data
 def add_word_gui_logic(word: str, sentence: str, note: str) -> bool:
     """Add a word via GUI with validation."""
     word = word.strip()
@@ -130,9 +696,10 @@ def add_word_gui_logic(word: str, sentence: str, note: str) -> bool:
     if not word or not sentence:
         return False
     
-    if word.lower() in [w.lower() for w in vocab.keys()]:
+    if vocab.find(word) is not None:
         return False
     
+    index_current = _due_index["version"] == vocab_version
     vocab[word] = {
         "sentence": sentence,
         "note": note,
@@ -142,60 +709,128 @@ def add_word_gui_logic(word: str, sentence: str, note: str) -> bool:
         "ease": 2.5,
         "history": [],
         "last_reviewed": None,
-        "next_review": datetime.now().strftime("%Y-%m-%d"),
-        "interval": 1
+        "next_review": _today_str(),
+        "interval": 1,
+        "blanked": blank_sentence(word, sentence)
     }
+    if index_current:
+        _insert_due_entry(word)
     save_vocab()
-    stats["words_added"] = stats.get("words_added", 0) + 1
-    save_stats()
+    stats["words_added"] += 1
+    _defer_save("stats")
     return True
 
+@_uses_data
 def remove_word(word: str) -> bool:
     """Remove a word from vocabulary."""
-    for w in vocab.keys():
-        if w.lower() == word.lower():
-            del vocab[w]
-            break
-        save_vocab()
-        stats["words_removed"] = stats.get("words_removed", 0) + 1
-        save_stats()
-        return True
-    return False
+    key = vocab.find(word)
+    if key is None:
+        return False
+    
+    index_current = _due_index["version"] == vocab_version
+    next_review = vocab[key].get("next_review", "")
+    del vocab[key]
+    if index_current:
+        _delete_due_entry(key, next_review)
+    save_vocab()
+    stats["words_removed"] += 1
+    _defer_save("stats")
+    return True
 
+@_uses_data
 def edit_word(word: str, new_sentence: str, new_note: str) -> bool:
     """Edit an existing word."""
     if word in vocab:
         vocab[word]["sentence"] = new_sentence.strip()
         vocab[word]["note"] = new_note.strip()
+        vocab[word]["blanked"] = blank_sentence(word, vocab[word]["sentence"])
+        index_current = _due_index["version"] == vocab_version
+        vocab.touch(word)
+        if index_current:
+            _due_index["version"] = vocab_version  # next_review did not change
         save_vocab()
         return True
     return False
 
 
+@_uses_data
+def record_answer(word: str, is_correct: bool, day: Optional[str] = None) -> None:
+    """
+    Count one quiz answer for word and log it in the word's history.
+    
+    day is the review date as YYYY-MM-DD, today if not given.
+    """
+    if word not in vocab:
+        return
+    
+    data = vocab[word]
+    data["times_reviewed"] = data.get("times_reviewed", 0) + 1
+    vocab.total_reviewed += 1
+    if is_correct:
+        data["times_correct"] = data.get("times_correct", 0) + 1
+        vocab.total_correct += 1
+    history = data.setdefault("history", [])
+    history.append({
+        "date": day or _today_str(),
+        "correct": is_correct
+    })
+    # Bound the per-word log so saves stay the same size over months of use
+    del history[:-MAX_HISTORY]
+    progress["total_reviews"] = progress.get("total_reviews", 0) + 1
+    
+    index_current = _due_index["version"] == vocab_version
+    vocab.touch(word)
+    if index_current:
+        _due_index["version"] = vocab_version  # next_review did not change
+    save_vocab()
+    save_progress()
+
+
 # ==================================================
 # SPACED REPETITION ALGORITHM
 # ==================================================
 
+@_uses_data
 def schedule_next_review(word: str, rating: int) -> None:
     """
     SM-2 Spaced Repetition Algorithm.
     
     Rating: 1=Again, 2=Hard, 3=Good, 4=Easy
     """
-    if word not in vocab:
-        return
-    
-    data = vocab[word]
-    today = datetime.now().strftime("%Y-%m-%d")
+    schedule_batch([(word, rating)])
+
+@_uses_data
+def schedule_batch(ratings: Iterable[Tuple[str, int]]) -> None:
+    """Schedule several (word, rating) pairs with a single save."""
+    today = _today_ordinal()
+    index_current = _due_index["version"] == vocab_version
+    plan_current = _plan_columns["version"] == vocab_version
+    old_dates = {}
+    for word, rating in ratings:
+        if word in vocab:
+            data = vocab[word]
+            old_dates.setdefault(word, data.get("next_review", ""))
+            vocab.box_counts[data.get("box", 1)] -= 1
+            _apply_rating(data, rating, today)
+            vocab.box_counts[data["box"]] += 1
     
+    if old_dates:
+        vocab.touch(*old_dates)
+        if index_current:
+            _move_due_entries(old_dates)
+        if plan_current:
+            _update_plan_entries(old_dates)
+        save_vocab()
+
+def _apply_rating(data: Dict, rating: int, today: int) -> None:
+    """Apply one SM-2 update to a word's data."""
     # Get current ease factor
     ease = data.get("ease", 2.5)
     interval = data.get("interval", 1)
     
-    # SM-2 formula: EF' = EF + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
-    # where q is quality (1-4)
+    # SM-2 ease update, q is quality (1-4)
     q = rating
-    ease = max(1.3, ease + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)))
+    ease = max(1.3, ease + _EASE_DELTA[q])
     
     # Calculate next interval
     if q < 3:  # If failed or hard
@@ -207,40 +842,148 @@ def schedule_next_review(word: str, rating: int) -> None:
             interval = round(interval * ease)
     
     # Schedule next review
-    next_date = datetime.now() + timedelta(days=interval)
+    next_date = date.fromordinal(today + interval)
     
     # Update word data
     data["ease"] = ease
     data["interval"] = interval
-    data["next_review"] = next_date.strftime("%Y-%m-%d")
-    data["box"] = min(5, max(1, data.get("box", 1) + (1 if q >= 3 else -1)))
-    
-    save_vocab()
+    data["next_review"] = next_date.isoformat()
+    data["box"] = min(5, max(1, data.get("box", 1) + _BOX_DELTA[q]))
 
 
 # ==================================================
 # STUDY SESSIONS
 # ==================================================
 
+# Words sorted by next_review; ISO date strings sort chronologically
+_due_index = {"version": None, "dates": [], "words": []}
+
+def _get_due_index() -> Dict:
+    """Return the due index, rebuilding it only after vocab changed."""
+    if _due_index["version"] != vocab_version:
+        # A missing next_review means the word is due, so it sorts first
+        entries = sorted((data.get("next_review", ""), word) for word, data in vocab.items())
+        _due_index["dates"] = [next_review for next_review, _ in entries]
+        _due_index["words"] = [word for _, word in entries]
+        _due_index["version"] = vocab_version
+    return _due_index
+
+def _due_position(next_review: str, word: str) -> int:
+    """Position of (next_review, word) in the due index."""
+    dates = _due_index["dates"]
+    lo = bisect_left(dates, next_review)
+    hi = bisect_right(dates, next_review, lo)
+    return bisect_left(_due_index["words"], word, lo, hi)
+
+def _insert_due_entry(word: str) -> None:
+    """Add word to the due index at its sorted position."""
+    next_review = vocab[word].get("next_review", "")
+    i = _due_position(next_review, word)
+    _due_index["dates"].insert(i, next_review)
+    _due_index["words"].insert(i, word)
+    _due_index["version"] = vocab_version
+
+def _delete_due_entry(word: str, next_review: str) -> None:
+    """Drop word, indexed under next_review, from the due index."""
+    i = _due_position(next_review, word)
+    del _due_index["dates"][i], _due_index["words"][i]
+    _due_index["version"] = vocab_version
+
+def _move_due_entries(old_dates: Dict[str, str]) -> None:
+    """Re-sort rescheduled words in place instead of rebuilding the due index."""
+    for word, old_date in old_dates.items():
+        _delete_due_entry(word, old_date)
+        _insert_due_entry(word)
+
+# Last due list, valid while neither the date nor vocab changed
+_due_cache = {"key": None, "words": []}
+
+def _cached_due_words() -> List[str]:
+    today = _today_str()
+    key = (today, vocab_version)
+    if _due_cache["key"] != key:
+        index = _get_due_index()
+        _due_cache["words"] = index["words"][:bisect_right(index["dates"], today)]
+        _due_cache["key"] = key
+    return _due_cache["words"]
+
+@_uses_data
 def get_due_words() -> List[str]:
     """Get all words due for review today."""
-    today = datetime.now().strftime("%Y-%m-%d")
-    due = []
-    for word, data in vocab.items():
-        next_review = data.get("next_review", today)
-        if next_review <= today:
-            due.append(word)
-    return due
+    return list(_cached_due_words())
 
+@_uses_data
 def get_due_count() -> int:
     """Get number of words due today."""
-    return len(get_due_words())
+    # Counting needs no list, just the cut-off position in the index
+    return bisect_right(_get_due_index()["dates"], _today_str())
 
 def suggested_daily_target() -> int:
     """Calculate suggested daily study target based on due words."""
     due = get_due_count()
     return max(5, min(20, due))
 
+def _date_independent_weight(data: Dict) -> float:
+    """Product of the priority factors that do not change from day to day."""
+    # Difficulty factor: higher ease = lower priority
+    ease = data.get("ease", 2.5)
+    difficulty_factor = 3.5 / ease
+    
+    # Accuracy factor: lower accuracy = higher priority
+    reviewed = data.get("times_reviewed", 0)
+    correct = data.get("times_correct", 0)
+    accuracy = correct / reviewed if reviewed > 0 else 0
+    accuracy_factor = 1 + (1 - accuracy) * 1.5
+    
+    # New word boost
+    new_word_factor = 1.8 if reviewed == 0 else 1
+    
+    # Recent performance: check last 5 reviews
+    history = data.get("history", [])
+    recent = history[-5:]
+    recent_errors = sum(1 for h in recent if not h.get("correct", True))
+    error_boost = 1 + recent_errors * 0.3
+    
+    return difficulty_factor * accuracy_factor * new_word_factor * error_boost
+
+def _due_ordinal(data: Dict, today: int) -> int:
+    """next_review as a day ordinal; a word without one is due today."""
+    next_review = data.get("next_review")
+    return date.fromisoformat(next_review).toordinal() if next_review else today
+
+# Study plan inputs as parallel columns, rebuilt only after vocab changed
+_plan_columns = {"version": None, "words": [], "due": [], "weight": [], "position": {}}
+
+def _get_plan_columns() -> Dict:
+    """Return the study plan columns, rebuilding them only after vocab changed."""
+    if _plan_columns["version"] != vocab_version:
+        today = _today_ordinal()
+        words, due, weight = [], [], []
+        for word, data in vocab.items():
+            # Parse next_review date once per rebuild, keep it as an ordinal
+            words.append(word)
+            due.append(_due_ordinal(data, today))
+            weight.append(_date_independent_weight(data))
+        position = {word: i for i, word in enumerate(words)}
+        _plan_columns.update(version=vocab_version, words=words, due=due,
+                             weight=weight, position=position)
+    return _plan_columns
+
+def _update_plan_entries(words: Iterable[str]) -> None:
+    """Refresh rescheduled words in place instead of rebuilding the plan columns."""
+    today = _today_ordinal()
+    position = _plan_columns["position"]
+    for word in words:
+        i = position[word]
+        data = vocab[word]
+        _plan_columns["due"][i] = _due_ordinal(data, today)
+        _plan_columns["weight"][i] = _date_independent_weight(data)
+    _plan_columns["version"] = vocab_version
+
+# Last plan built, valid for the same day, vocab version and target
+_plan_cache = {"key": None, "plan": []}
+
+@_uses_data
 def build_study_plan(target: int) -> List[str]:
     """
     Build a prioritized study plan for the session.
@@ -251,52 +994,36 @@ def build_study_plan(target: int) -> List[str]:
     - Recently failed words (higher priority)
     - New words (medium priority)
     """
-    today = datetime.today().date()
-    scored_words = []
+    today = _today_ordinal()
+    key = (today, vocab_version, target)
+    if _plan_cache["key"] == key:
+        return list(_plan_cache["plan"])
+    columns = _get_plan_columns()
     
-    for word, data in vocab.items():
-        # Parse next_review date
-        next_review = data.get("next_review", today)
-        if isinstance(next_review, str):
-            next_review = datetime.strptime(next_review, "%Y-%m-%d").date()
-        
-        # Overdue factor: each day overdue adds weight
-        overdue_days = max(0, (today - next_review).days)
-        overdue_factor = 1 + overdue_days * 0.15
-        
-        # Difficulty factor: higher ease = lower priority
-        ease = data.get("ease", 2.5)
-        difficulty_factor = 3.5 / ease
-        
-        # Accuracy factor: lower accuracy = higher priority
-        reviewed = data.get("times_reviewed", 0)
-        correct = data.get("times_correct", 0)
-        accuracy = correct / reviewed if reviewed > 0 else 0
-        accuracy_factor = 1 + (1 - accuracy) * 1.5
-        
-        # New word boost
-        new_word_factor = 1.8 if reviewed == 0 else 1
-        
-        # Recent performance: check last 5 reviews
-        history = data.get("history", [])
-        recent = history[-5:]
-        recent_errors = sum(1 for h in recent if not h.get("correct", True))
-        error_boost = 1 + recent_errors * 0.3
-        
-        priority = overdue_factor * difficulty_factor * accuracy_factor * new_word_factor * error_boost
-        scored_words.append((priority, word))
+    # Overdue factor: each day overdue adds weight
+    scored_words = (
+        ((1 + max(0, today - due) * 0.15) * weight, word)
+        for word, due, weight in zip(columns["words"], columns["due"], columns["weight"])
+    )
     
-    # Sort by priority and take top N
-    scored_words.sort(reverse=True)
-    plan = [w for _, w in scored_words[:target]]
+    if target >= len(columns["words"]):
+        # Small deck, the whole of it is studied: a plain sort beats the heap
+        ranked = sorted(scored_words, reverse=True)
+    else:
+        # Take the top N by priority without sorting the rest
+        # (nlargest itself reduces to max() when N is 1)
+        ranked = heapq.nlargest(target, scored_words)
+    plan = [w for _, w in ranked]
+    _plan_cache.update(key=key, plan=plan)
     
-    return plan
+    return list(plan)
 
 
 # ==================================================
 # STATISTICS & ANALYTICS
 # ==================================================
 
+@_uses_data
 def get_word_accuracy(word: str) -> float:
     """Get accuracy percentage for a word."""
     if word not in vocab:
@@ -308,16 +1035,50 @@ def get_word_accuracy(word: str) -> float:
     correct = data.get("times_correct", 0)
     return (correct / reviewed) * 100
 
+@_uses_data
+def get_all_accuracies() -> Dict[str, float]:
+    """Accuracy percentage of every word (shared and cached; do not modify)."""
+    return _all_accuracies(vocab_version)
+
+@functools.lru_cache(maxsize=1)
+def _all_accuracies(version: int) -> Dict[str, float]:
+    """get_all_accuracies for one vocab version, in a single pass."""
+    accuracies = {}
+    for word, data in vocab.items():
+        reviewed = data.get("times_reviewed", 0)
+        accuracies[word] = (data.get("times_correct", 0) / reviewed) * 100 if reviewed else 0.0
+    return accuracies
+
+@_uses_data
 def get_overall_accuracy() -> float:
     """Get overall accuracy across all words."""
-    total_reviewed = sum(d.get("times_reviewed", 0) for d in vocab.values())
-    if total_reviewed == 0:
+    if vocab.total_reviewed == 0:
         return 0.0
-    total_correct = sum(d.get("times_correct", 0) for d in vocab.values())
-    return (total_correct / total_reviewed) * 100
+    return (vocab.total_correct / vocab.total_reviewed) * 100
 
-def get_difficult_words(limit: int = 5) -> List[Tuple[str, float]]:
-    """Get most difficult words by error rate."""
+@dataclass(frozen=True)
+class VocabStats:
+    """Whole-vocabulary aggregates for the statistics view (read-only)."""
+    total_reviewed: int
+    total_correct: int
+    box_distribution: Dict[int, int]
+    difficult: Tuple[Tuple[str, float], ...]  # (word, error rate), hardest first
+
+    @property
+    def accuracy(self) -> float:
+        """Overall accuracy percentage."""
+        if self.total_reviewed == 0:
+            return 0.0
+        return (self.total_correct / self.total_reviewed) * 100
+
+@_uses_data
+def compute_all_stats(difficult_limit: int = 5) -> VocabStats:
+    """Aggregate totals, box counts and the hardest words (one pass over vocab)."""
+    return _vocab_stats(vocab_version, difficult_limit)
+
+@functools.lru_cache(maxsize=8)
+def _vocab_stats(version: int, difficult_limit: int) -> VocabStats:
+    """compute_all_stats for one vocab version."""
     difficulties = []
     for word, data in vocab.items():
         reviewed = data.get("times_reviewed", 0)
@@ -325,28 +1086,39 @@ def get_difficult_words(limit: int = 5) -> List[Tuple[str, float]]:
             error_rate = (reviewed - data.get("times_correct", 0)) / reviewed
             difficulties.append((word, error_rate))
     
-    difficulties.sort(key=lambda x: x[1], reverse=True)
-    return difficulties[:limit]
+    return VocabStats(
+        total_reviewed=vocab.total_reviewed,
+        total_correct=vocab.total_correct,
+        box_distribution=get_box_distribution(),
+        # Take the top N by error rate without sorting the rest
+        difficult=tuple(heapq.nlargest(difficult_limit, difficulties, key=lambda x: x[1]))
+    )
+
+@_uses_data
+def get_difficult_words(limit: int = 5) -> List[Tuple[str, float]]:
+    """Get most difficult words by error rate."""
+    return list(compute_all_stats(limit).difficult)
 
+@_uses_data
 def get_box_distribution() -> Dict[int, int]:
     """Get count of words in each memory box."""
+    # Read from the counts vocab maintains, no pass over the words
     distribution = {i: 0 for i in range(1, 6)}
-    for data in vocab.values():
-        box = data.get("box", 1)
-        distribution[box] = distribution.get(box, 0) + 1
+    distribution.update((box, count) for box, count in vocab.box_counts.items() if count)
     return distribution
 
+@_uses_data
 def update_streak() -> None:
     """Update study streak and reset daily counters."""
-    today = datetime.now().date()
+    today = _today_ordinal()
     last_date = progress.get("last_study_date")
     
     if last_date:
-        last_date = datetime.strptime(last_date, "%Y-%m-%d").date()
+        last_date = datetime.strptime(last_date, "%Y-%m-%d").toordinal()
         
         if today == last_date:
             return  # Already counted today
-        elif today == last_date + timedelta(days=1):
+        elif today == last_date + 1:
             progress["current_streak"] += 1
         else:
             progress["current_streak"] = 1
@@ -358,34 +1130,51 @@ def update_streak() -> None:
     
     # Reset daily counter for new day
     progress["studied_today"] = 0
-    progress["last_study_date"] = today.strftime("%Y-%m-%d")
+    progress["last_study_date"] = _today_str()
     save_progress()
 
+# (tracked value, tiers sorted by ascending threshold)
+_ACHIEVEMENT_TIERS = [
+    ("xp", [
+        (100, "XP_100", "Earned 100 XP"),
+        (500, "XP_500", "Earned 500 XP"),
+        (1000, "XP_1000", "Earned 1000 XP"),
+    ]),
+    ("streak", [
+        (3, "Streak_3", "3-day study streak"),
+        (7, "Streak_7", "7-day study streak"),
+        (30, "Streak_30", "30-day study streak"),
+    ]),
+    ("reviews", [
+        (100, "Reviews_100", "100 reviews completed"),
+        (500, "Reviews_500", "500 reviews completed"),
+    ]),
+    ("words", [
+        (50, "Words_50", "Added 50 words"),
+    ]),
+]
+
+@_uses_data
 def check_achievements() -> List[str]:
     """Check for unlocked achievements and return new ones."""
     new_achievements = []
+    unlocked = progress["achievements"]
+    
+    values = {
+        "xp": progress.get("xp", 0),
+        "streak": progress.get("current_streak", 0),
+        "reviews": progress.get("total_reviews", 0),
+        "words": len(vocab)
+    }
     
-    xp = progress.get("xp", 0)
-    streak = progress.get("current_streak", 0)
-    reviewed = progress.get("total_reviews", 0)
-    total_words = len(vocab)
-    
-    achievements_to_check = [
-        ("XP_100", xp >= 100, "Earned 100 XP"),
-        ("XP_500", xp >= 500, "Earned 500 XP"),
-        ("XP_1000", xp >= 1000, "Earned 1000 XP"),
-        ("Streak_3", streak >= 3, "3-day study streak"),
-        ("Streak_7", streak >= 7, "7-day study streak"),
-        ("Streak_30", streak >= 30, "30-day study streak"),
-        ("Reviews_100", reviewed >= 100, "100 reviews completed"),
-        ("Reviews_500", reviewed >= 500, "500 reviews completed"),
-        ("Words_50", total_words >= 50, "Added 50 words"),
-    ]
-    
-    for achievement_id, condition, message in achievements_to_check:
-        if condition and achievement_id not in progress.get("achievements", []):
-            progress["achievements"].append(achievement_id)
-            new_achievements.append(message)
+    for value_name, tiers in _ACHIEVEMENT_TIERS:
+        value = values[value_name]
+        for threshold, achievement_id, message in tiers:
+            if value < threshold:
+                break  # Tiers ascend, so no later one is reached either
+            if achievement_id not in unlocked:
+                unlocked.add(achievement_id)
+                new_achievements.append(message)
     
     if new_achievements:
         save_progress()
@@ -397,22 +1186,33 @@ def check_achievements() -> List[str]:
 # QUIZ & PRACTICE
 # ==================================================
 
+# Snapshot of the vocab keys, rebuilt only after vocab changed
+_word_keys = {"version": None, "keys": ()}
+
+@_uses_data
 def select_random_word() -> Optional[str]:
     """Select a random word from vocabulary."""
     if not vocab:
         return None
-    return random.choice(list(vocab.keys()))
+    if _word_keys["version"] != vocab_version:
+        _word_keys["keys"] = tuple(vocab)
+        _word_keys["version"] = vocab_version
+    return random.choice(_word_keys["keys"])
 
+@_uses_data
 def get_random_quiz_word() -> Optional[Tuple[str, str]]:
     """Get a random word and return (word, blank_sentence)."""
     word = select_random_word()
     if not word:
         return None
     
-    sentence = vocab[word]["sentence"]
-    blank = re.sub(word, "_____", sentence, flags=re.IGNORECASE)
+    data = vocab[word]
+    blank = data.get("blanked")
+    if blank is None:
+        blank = blank_sentence(word, data["sentence"])
     return word, blank
 
+@_uses_data
 def quiz_mode_single() -> Optional[Tuple[str, bool]]:
     """
     Run a single quiz question.
@@ -423,7 +1223,8 @@ def quiz_mode_single() -> Optional[Tuple[str, bool]]:
         return None
     
     word, blank = word_data
-    stats["quiz_attempts"] = stats.get("quiz_attempts", 0) + 1
+    stats["quiz_attempts"] += 1
+    _defer_save("stats")
     
     # This would be called from GUI with user input
     # For now, return the word data
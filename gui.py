@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font
 import core  as core
-from datetime import datetime, date, timedelta
+from bisect import bisect_right
+from contextlib import ExitStack
+from datetime import date
 
 
 
@@ -50,6 +52,24 @@ class Fonts:
 
 fonts = None  # Will be initialized after root is created
 
+# "0%" ... "100%", so table rows index a string instead of formatting one
+PERCENT_TEXT = [f"{i}%" for i in range(101)]
+
+
+def percent_text(value: float) -> str:
+    """value as a whole percent, e.g. "42%"."""
+    # Out-of-range values (e.g. hand-edited counts) are formatted as before
+    i = round(value)
+    return PERCENT_TEXT[i] if 0 <= i <= 100 else f"{value:.0f}%"
+
+# Heatmap cell color: HEAT_COLORS[i] is for values below HEAT_THRESHOLDS[i]
+# (and at least the threshold before it), i.e. 0, 1-9, 10-24, 25-49, 50+ reviews
+HEAT_THRESHOLDS = [1, 10, 25, 50]
+HEAT_COLORS = [Colors.BG_TERTIARY, "#1e40af", "#059669", Colors.SUCCESS, Colors.ACCENT]
+
+# Study session key -> recall rating
+RATING_KEYS = {"1": 1, "2": 2, "3": 3, "4": 4}
+
 
 # ==================================================
 # UTILITY COMPONENTS
@@ -75,9 +95,11 @@ class StatBox(tk.Frame):
     def __init__(self, parent, label: str, value: str = "0", value_color=Colors.ACCENT):
         super().__init__(parent, bg=Colors.BG_SECONDARY)
 
+        # Set the shown value with value.set(); the label follows the variable
+        self.value = tk.StringVar(self, value)
         tk.Label(
             self,
-            text=value,
+            textvariable=self.value,
             font=fonts.title_large,
             fg=value_color,
             bg=Colors.BG_SECONDARY
@@ -91,13 +113,11 @@ class StatBox(tk.Frame):
             bg=Colors.BG_SECONDARY
         ).pack(anchor="center")
 
-        self.value_label = self.winfo_children()[0]
-
 
 class ProgressRing(tk.Canvas):
     """Circular progress indicator."""
 
-    def __init__(self, parent, value: float = 0, size: int = 80, **kwargs):
+    def __init__(self, parent, value: int = 0, size: int = 80, **kwargs):
         super().__init__(
             parent,
             width=size,
@@ -107,42 +127,37 @@ class ProgressRing(tk.Canvas):
             **kwargs
         )
         self.size = size
-        self.value = value
-        self.draw_ring(value)
-
-    def draw_ring(self, value: float):
-        """Draw circular progress ring."""
-        self.delete("all")
+        self.value = None
 
-        radius = self.size / 2 - 8
-        center = self.size / 2
+        radius = size // 2 - 8
+        center = size // 2
+        box = (center - radius, center - radius, center + radius, center + radius)
 
-        # Background ring
-        self.create_oval(
-            center - radius, center - radius,
-            center + radius, center + radius,
-            outline=Colors.BG_TERTIARY,
-            width=6
-        )
-
-        # Progress ring
-        angle = (value / 100) * 360
-        self.create_arc(
-            center - radius, center - radius,
-            center + radius, center + radius,
-            start=90, extent=-angle,
+        # Items are created once; draw_ring only reconfigures them
+        self.create_oval(*box, outline=Colors.BG_TERTIARY, width=6)
+        self.arc = self.create_arc(
+            *box,
+            start=90, extent=0,
             outline=Colors.PRIMARY,
             width=6,
             style=tk.ARC
         )
-
-        # Center text
-        self.create_text(
+        self.label = self.create_text(
             center, center,
-            text=f"{int(value)}%",
             font=fonts.title_small,
             fill=Colors.TEXT_PRIMARY
         )
+        self.draw_ring(value)
+
+    def draw_ring(self, value: int):
+        """Show value (0-100) on the ring."""
+        # Whole percents in range, so the value can index PERCENT_TEXT
+        value = min(100, max(0, int(value)))
+        if value == self.value:
+            return
+        self.value = value
+        self.itemconfigure(self.arc, extent=-(value * 360 // 100))
+        self.itemconfigure(self.label, text=PERCENT_TEXT[value])
 
 
 # ==================================================
@@ -162,18 +177,52 @@ class VocabTrainerApp:
 
         # Session tracking
         self.session_active = False
+        self.session_writes = ExitStack()
+        self.pending_ratings = []  # (word, rating) pairs scheduled when the session ends
+        self.answer_keys = {}  # Casefolded spelling of each word in the session plan
+        self.session_window = None  # Built on first use, then hidden between sessions
+        self.session_plan = []
+        self.session_date = ""
+        self.session_state = {}
         self.session_stats = {
             "reviewed": 0,
             "correct": 0,
             "word_results": {}
         }
 
+        # Set once finish_ui has built the words and stats tabs
+        self.ui_finished = False
+
+        # Pending debounced search refresh
+        self.search_after_id = None
+
+        # (day ordinal, heatmap date keys) for that day, see heatmap_days
+        self.heatmap_keys = (None, [])
+        self.heatmap_window = None  # Built on first use, then hidden when closed
+        self.heatmap_cells = []  # Canvas rectangle ids, oldest day first
+
+        # Data versions each view was last drawn from (see is_stale)
+        self.shown_versions = {}
+
+        # Values of every row in the word table, keyed by word (the row iid),
+        # and the words whose rows are attached, i.e. match the search
+        self.table_rows = {}
+        self.attached_rows = set()
+
+        # Recover answers from a session that did not finish cleanly
+        core.replay_review_log()
+
         # Configure style
         self.setup_styles()
 
-        # Create UI
+        # Create UI hidden so Tk lays it out once instead of per widget
+        self.root.withdraw()
         self.create_ui()
         self.refresh_all()
+        self.root.update_idletasks()
+        self.root.deiconify()
+        # Scheduled only now: update_idletasks above would have run it early
+        self.root.after_idle(self.finish_ui)
 
         # Handle close
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -230,15 +279,18 @@ class VocabTrainerApp:
         self.notebook.add(self.study_tab, text="📚 Study")
         self.create_study_tab()
 
-        # Words tab
+        # Words and stats tabs: frames now, contents once the window is up
         self.words_tab = tk.Frame(self.notebook, bg=Colors.BG_PRIMARY)
         self.notebook.add(self.words_tab, text="📝 Manage Words")
-        self.create_words_tab()
-
-        # Stats tab
         self.stats_tab = tk.Frame(self.notebook, bg=Colors.BG_PRIMARY)
         self.notebook.add(self.stats_tab, text="📊 Statistics")
+
+    def finish_ui(self):
+        """Build the tabs that are not shown at startup and fill them."""
+        self.create_words_tab()
         self.create_stats_tab()
+        self.ui_finished = True
+        self.refresh_all()
 
     def create_study_tab(self):
         """Build the study/dashboard tab."""
@@ -297,24 +349,23 @@ class VocabTrainerApp:
         progress_info = tk.Frame(progress_frame, bg=Colors.BG_SECONDARY)
         progress_info.pack(side="left", expand=True, fill="y")
 
-        tk.Label(
+        self.progress_label = tk.Label(
             progress_info,
             text="0 / 0 words studied",
             font=fonts.body,
             fg=Colors.TEXT_PRIMARY,
             bg=Colors.BG_SECONDARY
-        ).pack(anchor="w")
+        )
+        self.progress_label.pack(anchor="w")
 
-        tk.Label(
+        self.progress_sublabel = tk.Label(
             progress_info,
             text="Keep up the momentum!",
             font=fonts.body_small,
             fg=Colors.TEXT_SECONDARY,
             bg=Colors.BG_SECONDARY
-        ).pack(anchor="w")
-
-        self.progress_label = progress_info.winfo_children()[0]
-        self.progress_sublabel = progress_info.winfo_children()[1]
+        )
+        self.progress_sublabel.pack(anchor="w")
 
         # Study controls
         control_card = Card(main_frame)
@@ -469,7 +520,7 @@ class VocabTrainerApp:
             bd=0
         )
         self.search_entry.pack(fill="x", pady=(5, 0))
-        self.search_var.trace_add("write", lambda *args: self.refresh_word_table())
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
 
         # Words table
         table_card = Card(main_frame)
@@ -577,16 +628,16 @@ class VocabTrainerApp:
         dist_frame = tk.Frame(dist_card, bg=Colors.BG_SECONDARY)
         dist_frame.pack(fill="x", padx=15, pady=(0, 15))
 
-        self.box_labels = {}
+        self.box_texts = {}
         for i in range(1, 6):
+            self.box_texts[i] = tk.StringVar(dist_frame, f"Box {i}: 0")
             tk.Label(
                 dist_frame,
-                text=f"Box {i}: 0",
+                textvariable=self.box_texts[i],
                 font=fonts.body_small,
                 fg=Colors.TEXT_SECONDARY,
                 bg=Colors.BG_SECONDARY
             ).pack(anchor="w")
-            self.box_labels[i] = dist_frame.winfo_children()[-1]
 
         # Difficult words
         difficult_card = Card(main_frame)
@@ -600,8 +651,21 @@ class VocabTrainerApp:
             bg=Colors.BG_SECONDARY
         ).pack(anchor="w", padx=15, pady=(10, 5))
 
-        self.difficult_frame = tk.Frame(difficult_card, bg=Colors.BG_SECONDARY)
-        self.difficult_frame.pack(fill="x", padx=15, pady=(0, 15))
+        difficult_frame = tk.Frame(difficult_card, bg=Colors.BG_SECONDARY)
+        difficult_frame.pack(fill="x", padx=15, pady=(0, 15))
+
+        # Created once; refresh_stats fills and packs the first ones it needs
+        self.difficult_labels = [
+            tk.Label(
+                difficult_frame,
+                text="",
+                font=fonts.body_small,
+                fg=Colors.TEXT_SECONDARY,
+                bg=Colors.BG_SECONDARY
+            )
+            for _ in range(5)
+        ]
+        self.difficult_shown = 0
 
     # ==================================================
     # STUDY SESSION
@@ -630,17 +694,24 @@ class VocabTrainerApp:
             self.session_active = False
             return
 
+        # The whole session is logged under the day it started
+        self.session_date = date.today().isoformat()
+
+        # Answers are compared casefolded, so "STRASSE" matches "straße"
+        self.answer_keys = {word: word.casefold() for word in plan}
+
+        # Defer all saves until the session ends: one write per data file
+        self.session_writes.enter_context(core.batched_writes())
         self.open_session_window(plan)
 
     def open_session_window(self, plan: list):
-        """Open the study session window."""
-        session_window = tk.Toplevel(self.root)
-        session_window.title("Study Session")
-        session_window.geometry("600x450")
-        session_window.config(bg=Colors.BG_PRIMARY)
+        """Show the study session window for a new plan."""
+        if self.session_window is None:
+            self.build_session_window()
 
         # Session state
-        state = {
+        self.session_plan = plan
+        self.session_state = {
             "index": 0,
             "correct": 0,
             "reviewed": 0,
@@ -649,27 +720,43 @@ class VocabTrainerApp:
             "hint_level": 0,
             "hint_used": False
         }
+        self.session_stats_text.set("")
+
+        self.session_window.update_idletasks()
+        self.session_window.deiconify()
+        self.load_study_word()
+
+    def build_session_window(self):
+        """Create the study session window once; later sessions reuse it."""
+        session_window = tk.Toplevel(self.root)
+        session_window.title("Study Session")
+        session_window.geometry("600x450")
+        session_window.config(bg=Colors.BG_PRIMARY)
+        session_window.withdraw()  # Shown by open_session_window
+        session_window.protocol("WM_DELETE_WINDOW", self.abort_session)
+        self.session_window = session_window
 
         # Header
         header = tk.Frame(session_window, bg=Colors.BG_PRIMARY)
         header.pack(fill="x", padx=20, pady=10)
 
+        self.session_header_text = tk.StringVar()
         tk.Label(
             header,
-            text=f"Word {1}/{len(plan)}",
+            textvariable=self.session_header_text,
             font=fonts.title_small,
             fg=Colors.TEXT_PRIMARY,
             bg=Colors.BG_PRIMARY
         ).pack(side="left")
 
-        stats_lbl = tk.Label(
+        self.session_stats_text = tk.StringVar()
+        tk.Label(
             header,
-            text="",
+            textvariable=self.session_stats_text,
             font=fonts.body_small,
             fg=Colors.ACCENT,
             bg=Colors.BG_PRIMARY
-        )
-        stats_lbl.pack(side="right")
+        ).pack(side="right")
 
         # Card
         card = Card(session_window)
@@ -679,20 +766,20 @@ class VocabTrainerApp:
         card_frame.pack(fill="both", expand=True, padx=15, pady=15)
 
         # Sentence
-        sentence_lbl = tk.Label(
+        self.sentence_text = tk.StringVar()
+        tk.Label(
             card_frame,
-            text="",
+            textvariable=self.sentence_text,
             font=fonts.title_medium,
             fg=Colors.TEXT_PRIMARY,
             bg=Colors.BG_SECONDARY,
             wraplength=500,
             justify="center",
             pady=15
-        )
-        sentence_lbl.pack(pady=(0, 20), fill="x")
+        ).pack(pady=(0, 20), fill="x")
 
         # Answer input
-        answer_entry = tk.Entry(
+        self.answer_entry = tk.Entry(
             card_frame,
             font=fonts.body,
             bg=Colors.BG_TERTIARY,
@@ -702,22 +789,22 @@ class VocabTrainerApp:
             bd=0,
             width=30
         )
-        answer_entry.pack(pady=(0, 10))
+        self.answer_entry.pack(pady=(0, 10))
 
         # Hint
-        hint_lbl = tk.Label(
+        self.hint_text = tk.StringVar()
+        tk.Label(
             card_frame,
-            text="",
+            textvariable=self.hint_text,
             font=fonts.body_small,
-            fg=Colors.TEXT_MUTED,
+            fg=Colors.ACCENT,
             bg=Colors.BG_SECONDARY
-        )
-        hint_lbl.pack(pady=(0, 10))
+        ).pack(pady=(0, 10))
 
         tk.Button(
             card_frame,
             text="💡 Hint",
-            command=lambda: self.show_hint(state, plan, hint_lbl),
+            command=self.show_hint,
             font=fonts.body_small,
             bg=Colors.BG_TERTIARY,
             fg=Colors.ACCENT,
@@ -728,60 +815,21 @@ class VocabTrainerApp:
         ).pack(pady=(0, 20))
 
         # Feedback
-        feedback_lbl = tk.Label(
+        self.feedback_text = tk.StringVar()
+        self.feedback_lbl = tk.Label(
             card_frame,
-            text="",
+            textvariable=self.feedback_text,
             font=fonts.body,
             fg=Colors.SUCCESS,
             bg=Colors.BG_SECONDARY
         )
-        feedback_lbl.pack(pady=(0, 15))
+        self.feedback_lbl.pack(pady=(0, 15))
 
         # Submit button
-        def submit():
-            guess = answer_entry.get().strip()
-            if not guess or state["answered"]:
-                return
-
-            state["answered"] = True
-            word = plan[state["index"]]
-            is_correct = guess.lower() == word.lower()
-
-            if is_correct:
-                feedback_lbl.config(text="✓ Correct!", fg=Colors.SUCCESS)
-                core.vocab[word]["times_correct"] += 1
-                state["correct"] += 1
-            else:
-                feedback_lbl.config(text=f"✗ Wrong — {word}", fg=Colors.DANGER)
-
-            core.vocab[word]["times_reviewed"] += 1
-            core.progress["total_reviews"] = core.progress.get("total_reviews", 0) + 1
-            state["reviewed"] += 1  # Track reviews in session
-            self.session_stats["reviewed"] += 1
-            if is_correct:
-                self.session_stats["correct"] += 1
-
-            # Record history
-            core.vocab[word].setdefault("history", []).append({
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "correct": is_correct
-            })
-
-            # Update stats
-            stats_lbl.config(
-                text=f"Accuracy: {(state['correct'] / max(1, state['index'] + 1) * 100):.0f}%"
-            )
-
-            # Enable rating
-            state["can_rate"] = True
-            for btn in rating_buttons:
-                btn.config(state="normal")
-            submit_btn.config(state="disabled")
-
-        submit_btn = tk.Button(
+        self.submit_btn = tk.Button(
             card_frame,
             text="Submit",
-            command=submit,
+            command=self.submit_answer,
             font=fonts.title_small,
             bg=Colors.PRIMARY,
             fg=Colors.TEXT_PRIMARY,
@@ -791,81 +839,125 @@ class VocabTrainerApp:
             pady=8,
             activebackground=Colors.PRIMARY_DARK
         )
-        submit_btn.pack()
-
-        session_window.bind("<Return>", lambda e: submit() if not state["answered"] else None)
-        answer_entry.focus()
+        self.submit_btn.pack()
 
         # Rating buttons
         btn_frame = tk.Frame(card_frame, bg=Colors.BG_SECONDARY)
         btn_frame.pack(fill="x", pady=15)
 
-        def rate(rating):
-            if not state["can_rate"]:
-                return
-
-            word = plan[state["index"]]
-            core.schedule_next_review(word, rating)
-            core.save_vocab()
-
-            state["index"] += 1
-
-            if state["index"] >= len(plan):
-                self.finish_session(plan, state, session_window)
-            else:
-                self.load_study_word(state, plan, sentence_lbl, answer_entry,
-                                     hint_lbl, feedback_lbl, stats_lbl, submit_btn)
-
-        rating_buttons = [
-            tk.Button(btn_frame, text="1 Again", command=lambda: rate(1),
+        self.rating_buttons = [
+            tk.Button(btn_frame, text="1 Again", command=lambda: self.rate_answer(1),
                       font=fonts.body_small, bg=Colors.DANGER, fg="blue",
                       relief=tk.FLAT, bd=0, padx=10, pady=5, state="disabled"),
-            tk.Button(btn_frame, text="2 Hard", command=lambda: rate(2),
+            tk.Button(btn_frame, text="2 Hard", command=lambda: self.rate_answer(2),
                       font=fonts.body_small, bg=Colors.WARNING, fg="blue",
                       relief=tk.FLAT, bd=0, padx=10, pady=5, state="disabled"),
-            tk.Button(btn_frame, text="3 Good", command=lambda: rate(3),
+            tk.Button(btn_frame, text="3 Good", command=lambda: self.rate_answer(3),
                       font=fonts.body_small, bg=Colors.ACCENT, fg="blue",
                       relief=tk.FLAT, bd=0, padx=10, pady=5, state="disabled"),
-            tk.Button(btn_frame, text="4 Easy", command=lambda: rate(4),
+            tk.Button(btn_frame, text="4 Easy", command=lambda: self.rate_answer(4),
                       font=fonts.body_small, bg=Colors.SUCCESS, fg="blue",
                       relief=tk.FLAT, bd=0, padx=10, pady=5, state="disabled"),
         ]
 
-        for btn in rating_buttons:
+        for btn in self.rating_buttons:
             btn.pack(side="left", padx=5)
 
-        session_window.bind("1", lambda e: rate(1) if state["can_rate"] else None)
-        session_window.bind("2", lambda e: rate(2) if state["can_rate"] else None)
-        session_window.bind("3", lambda e: rate(3) if state["can_rate"] else None)
-        session_window.bind("4", lambda e: rate(4) if state["can_rate"] else None)
+        # Enter submits, 1-4 rate: one binding dispatches every key
+        session_window.bind("<Key>", self.on_session_key)
+
+    def on_session_key(self, event):
+        """Handle a key press in the study session window."""
+        state = self.session_state
+        if event.keysym == "Return":
+            if not state["answered"]:
+                self.submit_answer()
+        elif event.keysym in RATING_KEYS and state["can_rate"]:
+            self.rate_answer(RATING_KEYS[event.keysym])
+
+    def submit_answer(self):
+        """Check the typed answer for the current card."""
+        state = self.session_state
+        guess = self.answer_entry.get().strip()
+        if not guess or state["answered"]:
+            return
+
+        state["answered"] = True
+        word = self.session_plan[state["index"]]
+        is_correct = guess.casefold() == self.answer_keys[word]
+
+        if is_correct:
+            self.feedback_text.set("✓ Correct!")
+            self.feedback_lbl.config(fg=Colors.SUCCESS)
+            state["correct"] += 1
+        else:
+            self.feedback_text.set(f"✗ Wrong — {word}")
+            self.feedback_lbl.config(fg=Colors.DANGER)
+
+        # Update counters and history
+        core.record_answer(word, is_correct, self.session_date)
+        state["is_correct"] = is_correct
+        state["reviewed"] += 1  # Track reviews in session
+        self.session_stats["reviewed"] += 1
+        if is_correct:
+            self.session_stats["correct"] += 1
+
+        # Update stats
+        self.session_stats_text.set(
+            f"Accuracy: {(state['correct'] / max(1, state['index'] + 1) * 100):.0f}%"
+        )
 
-        self.load_study_word(state, plan, sentence_lbl, answer_entry,
-                             hint_lbl, feedback_lbl, stats_lbl, submit_btn)
+        # Enable rating
+        state["can_rate"] = True
+        for btn in self.rating_buttons:
+            btn.config(state="normal")
+        self.submit_btn.config(state="disabled")
 
-    def load_study_word(self, state, plan, sentence_lbl, answer_entry,
-                        hint_lbl, feedback_lbl, stats_lbl, submit_btn):
+    def rate_answer(self, rating):
+        """Rate recall of the current card and move on."""
+        state = self.session_state
+        if not state["can_rate"]:
+            return
+
+        word = self.session_plan[state["index"]]
+        self.pending_ratings.append((word, rating))
+        core.log_review(word, state["is_correct"], rating, self.session_date)
+
+        state["index"] += 1
+
+        if state["index"] >= len(self.session_plan):
+            self.finish_session()
+        else:
+            self.load_study_word()
+
+    def load_study_word(self):
         """Load next word in study session."""
-        word = plan[state["index"]]
+        state = self.session_state
+        word = self.session_plan[state["index"]]
         sentence = core.vocab[word]["sentence"]
         # Replace word with brackets so it's clearly visible as a blank
-        blank = core.re.sub(word, f"[{len(word) * '_'}]", sentence, flags=core.re.IGNORECASE)
+        blank = core.blank_sentence(word, sentence, f"[{len(word) * '_'}]")
 
-        sentence_lbl.config(text=blank, fg=Colors.TEXT_PRIMARY)
-        answer_entry.delete(0, tk.END)
-        hint_lbl.config(text="")
-        feedback_lbl.config(text="")
-        submit_btn.config(state="normal")
+        self.session_header_text.set(f"Word {state['index'] + 1}/{len(self.session_plan)}")
+        self.sentence_text.set(blank)
+        self.answer_entry.delete(0, tk.END)
+        self.hint_text.set("")
+        self.feedback_text.set("")
+        self.submit_btn.config(state="normal")
+        for btn in self.rating_buttons:
+            btn.config(state="disabled")
 
         state["can_rate"] = False
         state["answered"] = False
         state["hint_level"] = 0
         state["hint_used"] = False
 
-        answer_entry.focus()
+        self.answer_entry.focus()
 
-    def show_hint(self, state, plan, hint_lbl):
+    def show_hint(self):
         """Show hint for current word."""
-        word = plan[state["index"]]
+        state = self.session_state
+        word = self.session_plan[state["index"]]
         state["hint_level"] = min(state["hint_level"] + 1, len(word))
         state["hint_used"] = True
 
@@ -873,10 +965,12 @@ class VocabTrainerApp:
         revealed = word[:state["hint_level"]]
         remaining = "•" * (len(word) - state["hint_level"])  # Bullets for hidden letters
         hint = revealed + remaining
-        hint_lbl.config(text=f"💡 Hint: {hint}", fg=Colors.ACCENT)
+        self.hint_text.set(f"💡 Hint: {hint}")
 
-    def finish_session(self, plan, state, session_window):
+    def finish_session(self):
         """Finish study session and show summary."""
+        plan, state = self.session_plan, self.session_state
+        self.schedule_ratings()
         core.update_streak()
 
         # Track for the daily goal: how many reviews were completed in this session
@@ -885,7 +979,7 @@ class VocabTrainerApp:
         core.progress["studied_today"] = core.progress.get("studied_today", 0) + num_reviews_this_session
         core.progress["xp"] = core.progress.get("xp", 0) + state["correct"] * 5
 
-        today = str(date.today())
+        today = self.session_date
         history = core.progress.setdefault("history", {})
         # History tracks number of words reviewed per day
         history[today] = history.get(today, 0) + num_reviews_this_session
@@ -897,8 +991,9 @@ class VocabTrainerApp:
         if new_achievements:
             messagebox.showinfo("🎉 Achievements Unlocked", "\n".join(new_achievements))
 
-        session_window.destroy()
+        self.session_window.withdraw()
         self.session_active = False
+        self.save_session()
 
         accuracy = (state["correct"] / len(plan) * 100) if plan else 0
         messagebox.showinfo(
@@ -908,6 +1003,26 @@ class VocabTrainerApp:
 
         self.refresh_all()
 
+    def schedule_ratings(self):
+        """Schedule the session's ratings in one batch."""
+        core.schedule_batch(self.pending_ratings)
+        self.pending_ratings = []
+
+    def abort_session(self):
+        """Close an unfinished session, keeping the reviews done so far."""
+        self.schedule_ratings()
+        self.session_window.withdraw()
+        self.session_active = False
+        self.save_session()
+        self.refresh_all()
+
+    def save_session(self):
+        """Write the session's deferred saves."""
+        # The review log goes first: a crash between the two then loses at
+        # most this flush, instead of replaying answers that were saved
+        core.clear_review_log()
+        self.session_writes.close()
+
     # ==================================================
     # WORD MANAGEMENT
     # ==================================================
@@ -927,7 +1042,6 @@ class VocabTrainerApp:
             self.word_entry.delete(0, tk.END)
             self.sentence_entry.delete(0, tk.END)
             self.note_entry.delete(0, tk.END)
-            self.refresh_word_table()
             self.refresh_all()
         else:
             messagebox.showerror("Error", "Word already exists or invalid input")
@@ -949,7 +1063,6 @@ class VocabTrainerApp:
         if messagebox.askyesno("Confirm", f"Delete '{word}'?"):
             if core.remove_word(word):
                 messagebox.showinfo("Deleted", f"Removed '{word}'")
-                self.refresh_word_table()
                 self.refresh_all()
             else:
                 messagebox.showerror("Error", "Failed to delete word")
@@ -966,6 +1079,7 @@ class VocabTrainerApp:
         edit_win.title(f"Edit '{word}'")
         edit_win.geometry("500x300")
         edit_win.config(bg=Colors.BG_PRIMARY)
+        edit_win.withdraw()  # Shown once all widgets are packed
 
         frame = tk.Frame(edit_win, bg=Colors.BG_PRIMARY)
         frame.pack(fill="both", expand=True, padx=15, pady=15)
@@ -1034,6 +1148,9 @@ class VocabTrainerApp:
             activebackground=Colors.PRIMARY_DARK
         ).pack(anchor="w")
 
+        edit_win.update_idletasks()
+        edit_win.deiconify()
+
     def show_word_details(self):
         """Show detailed stats for a word."""
         word = self.get_selected_word()
@@ -1072,26 +1189,62 @@ class VocabTrainerApp:
                 bg=Colors.BG_PRIMARY
             ).pack(anchor="w", pady=5)
 
-    def refresh_word_table(self):
-        """Refresh the word table based on search."""
-        for row in self.word_table.get_children():
-            self.word_table.delete(row)
+    def schedule_search(self):
+        """Refresh the word table once typing pauses, not on every keystroke."""
+        if self.search_after_id:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(150, self.run_search)
+
+    def run_search(self):
+        """Run the pending search refresh."""
+        self.search_after_id = None
+        self.refresh_word_table()
 
+    def refresh_word_table(self):
+        """Refresh the word table based on search, touching only rows that changed."""
         query = self.search_var.get().lower()
+        if not self.is_stale("table", (core.vocab_version, query)):
+            return
 
-        for word, data in core.vocab.items():
-            if query and not (query in word.lower() or
-                              query in data["sentence"].lower() or
-                              query in data["note"].lower()):
-                continue
-
-            accuracy = core.get_word_accuracy(word)
-            self.word_table.insert(
-                "",
-                "end",
-                values=(word, data["sentence"][:40] + "..." if len(data["sentence"]) > 40 else data["sentence"],
-                        data["note"][:20] + "..." if len(data["note"]) > 20 else data["note"], f"{accuracy:.0f}%")
-            )
+        if query:
+            search_text = core.vocab.search_text
+            shown = [word for word in core.vocab if query in search_text(word)]
+        else:
+            # No search: every word is shown, skip the filter entirely
+            shown = core.vocab
+
+        display_fields = core.vocab.display_fields
+        accuracies = core.get_all_accuracies()
+        rows = {
+            word: (word, *display_fields(word), percent_text(accuracies[word]))
+            for word in shown
+        }
+
+        table_rows, attached = self.table_rows, self.attached_rows
+        # Rows of removed words are deleted; rows filtered out by the search
+        # are only detached, so clearing the search reattaches them
+        gone = [word for word in table_rows if word not in core.vocab]
+        if gone:
+            self.word_table.delete(*gone)
+            for word in gone:
+                del table_rows[word]
+            attached.difference_update(gone)
+        hidden = attached - rows.keys()
+        if hidden:
+            self.word_table.detach(*hidden)
+            attached -= hidden
+        # Rows are visited in vocab order, so index places a newly shown row
+        # between the rows that stayed
+        for index, (word, values) in enumerate(rows.items()):
+            if word not in table_rows:
+                self.word_table.insert("", index, iid=word, values=values)
+            else:
+                if table_rows[word] != values:
+                    self.word_table.item(word, values=values)
+                if word not in attached:
+                    self.word_table.move(word, "", index)
+            table_rows[word] = values
+            attached.add(word)
 
     # ==================================================
     # STATISTICS
@@ -1099,10 +1252,28 @@ class VocabTrainerApp:
 
     def show_heatmap(self):
         """Show study activity heatmap."""
+        if self.heatmap_window is None:
+            self.build_heatmap_window()
+
+        # Cells keep their colors while neither the progress nor the day changed
+        if self.is_stale("heatmap", (core.progress_version, date.today())):
+            history = core.progress.get("history", {})
+            for cell_id, key in zip(self.heatmap_cells, self.heatmap_days()):
+                color = HEAT_COLORS[bisect_right(HEAT_THRESHOLDS, history.get(key, 0))]
+                self.heatmap_canvas.itemconfigure(cell_id, fill=color)
+
+        self.heatmap_window.deiconify()
+        self.heatmap_window.lift()
+
+    def build_heatmap_window(self):
+        """Create the heatmap window and its cells once; show_heatmap repaints them."""
         heatmap_win = tk.Toplevel(self.root)
         heatmap_win.title("Study Activity Heatmap")
         heatmap_win.geometry("600x400")
         heatmap_win.config(bg=Colors.BG_PRIMARY)
+        heatmap_win.withdraw()  # Shown by show_heatmap
+        heatmap_win.protocol("WM_DELETE_WINDOW", heatmap_win.withdraw)
+        self.heatmap_window = heatmap_win
 
         frame = tk.Frame(heatmap_win, bg=Colors.BG_PRIMARY)
         frame.pack(fill="both", expand=True, padx=20, pady=20)
@@ -1118,109 +1289,101 @@ class VocabTrainerApp:
         heatmap_frame = tk.Frame(frame, bg=Colors.BG_SECONDARY)
         heatmap_frame.pack(fill="both", expand=True)
 
-        history = core.progress.get("history", {})
-        today = datetime.today()
+        # One canvas of rectangles instead of 84 Label widgets
+        cell, gap = 28, 4
+        canvas = tk.Canvas(
+            heatmap_frame,
+            width=12 * (cell + gap) + gap,
+            height=7 * (cell + gap) + gap,
+            bg=Colors.BG_SECONDARY,
+            highlightthickness=0
+        )
+        canvas.pack(anchor="nw")
+        self.heatmap_canvas = canvas
 
         for i in range(84):
-            day = today - timedelta(days=83 - i)
-            key = day.date().isoformat()
-            value = history.get(key, 0)
-
-            if value == 0:
-                color = Colors.BG_TERTIARY
-            elif value < 10:
-                color = "#1e40af"
-            elif value < 25:
-                color = "#059669"
-            elif value < 50:
-                color = Colors.SUCCESS
-            else:
-                color = Colors.ACCENT
-
-            cell = tk.Label(
-                heatmap_frame,
-                text="",
-                width=3,
-                height=2,
-                bg=color
+            x = gap + (i % 12) * (cell + gap)
+            y = gap + (i // 12) * (cell + gap)
+            self.heatmap_cells.append(
+                canvas.create_rectangle(x, y, x + cell, y + cell, outline="")
             )
-            cell.grid(row=i // 12, column=i % 12, padx=2, pady=2)
 
-    def refresh_stats(self):
-        """Refresh all statistics displays."""
-        # Dashboard
-        self.stat_streak.value_label.config(
-            text=str(core.progress.get("current_streak", 0))
-        )
-        self.stat_due.value_label.config(
-            text=str(core.get_due_count())
-        )
-        self.stat_xp.value_label.config(
-            text=str(core.progress.get("xp", 0))
-        )
-        self.stat_words.value_label.config(
-            text=str(len(core.vocab))
-        )
+    def heatmap_days(self) -> list:
+        """The last 84 days as YYYY-MM-DD keys, oldest first (rebuilt once a day)."""
+        today = date.today().toordinal()
+        if self.heatmap_keys[0] != today:
+            self.heatmap_keys = (today, [date.fromordinal(day).isoformat()
+                                         for day in range(today - 83, today + 1)])
+        return self.heatmap_keys[1]
+
+    def refresh_dashboard(self):
+        """Refresh the study tab's dashboard."""
+        if not self.is_stale("dashboard", (core.vocab_version, core.progress_version, date.today())):
+            return
+        self.stat_streak.value.set(str(core.progress.get("current_streak", 0)))
+        self.stat_due.value.set(str(core.get_due_count()))
+        self.stat_xp.value.set(str(core.progress.get("xp", 0)))
+        self.stat_words.value.set(str(len(core.vocab)))
 
         # Progress
-        due = core.get_due_count()
         suggested = core.suggested_daily_target()
         studied = core.progress.get("studied_today", 0)
-        progress_percent = min(100, (studied / suggested) * 100 if suggested > 0 else 0)
+        # suggested_daily_target is at least 5, so no zero check is needed
+        progress_percent = 100 if studied >= suggested else studied * 100 // suggested
 
         self.progress_ring.draw_ring(progress_percent)
         self.progress_label.config(text=f"{studied} / {suggested} words studied")
         self.progress_sublabel.config(text="Great work!" if progress_percent >= 100 else "Keep going!")
 
-        # Stats tab
-        accuracy = core.get_overall_accuracy()
-        self.stat_accuracy.value_label.config(text=f"{accuracy:.1f}%")
-
-        total_reviews = sum(d.get("times_reviewed", 0) for d in core.vocab.values())
-        self.stat_reviews.value_label.config(text=str(total_reviews))
-
-        self.stat_longest_streak.value_label.config(
-            text=str(core.progress.get("longest_streak", 0))
-        )
+    def refresh_stats(self):
+        """Refresh the statistics tab."""
+        if not self.is_stale("stats", (core.vocab_version, core.progress_version)):
+            return
+        stats = core.compute_all_stats(5)
+        self.stat_accuracy.value.set(f"{stats.accuracy:.1f}%")
+        self.stat_reviews.value.set(str(stats.total_reviewed))
+        self.stat_longest_streak.value.set(str(core.progress.get("longest_streak", 0)))
 
         # Box distribution
-        distribution = core.get_box_distribution()
-        for box, count in distribution.items():
-            self.box_labels[box].config(text=f"Box {box}: {count} words")
+        for box, count in stats.box_distribution.items():
+            self.box_texts[box].set(f"Box {box}: {count} words")
 
         # Difficult words
-        for widget in self.difficult_frame.winfo_children():
-            widget.destroy()
-
-        difficult = core.get_difficult_words(5)
-        for word, error_rate in difficult:
-            tk.Label(
-                self.difficult_frame,
-                text=f"• {word}: {error_rate * 100:.0f}% error rate",
-                font=fonts.body_small,
-                fg=Colors.TEXT_SECONDARY,
-                bg=Colors.BG_SECONDARY
-            ).pack(anchor="w", pady=2)
-
-        if not difficult:
-            tk.Label(
-                self.difficult_frame,
-                text="No data yet",
-                font=fonts.body_small,
-                fg=Colors.TEXT_MUTED,
-                bg=Colors.BG_SECONDARY
-            ).pack(anchor="w")
+        if stats.difficult:
+            lines = [(f"• {word}: {error_rate * 100:.0f}% error rate", Colors.TEXT_SECONDARY)
+                     for word, error_rate in stats.difficult]
+        else:
+            lines = [("No data yet", Colors.TEXT_MUTED)]
+
+        for label, (text, color) in zip(self.difficult_labels, lines):
+            label.config(text=text, fg=color)
+        # Labels are used from the front, so packing in order keeps them sorted
+        for label in self.difficult_labels[self.difficult_shown:len(lines)]:
+            label.pack(anchor="w", pady=2)
+        for label in self.difficult_labels[len(lines):self.difficult_shown]:
+            label.pack_forget()
+        self.difficult_shown = len(lines)
+
+    def is_stale(self, view: str, key: tuple) -> bool:
+        """Record key as what view shows; True if it showed something else."""
+        if self.shown_versions.get(view) == key:
+            return False
+        self.shown_versions[view] = key
+        return True
 
     def refresh_all(self):
         """Refresh all displays."""
-        self.refresh_word_table()
-        self.refresh_stats()
+        self.refresh_dashboard()
+        if self.ui_finished:
+            self.refresh_word_table()
+            self.refresh_stats()
 
     def on_close(self):
         """Handle window close."""
-        core.save_vocab()
-        core.save_progress()
-        core.save_stats()
+        self.schedule_ratings()
+        self.save_session()
+        # Every change is already saved or pending; write only the pending files
+        core.flush_writes()
         self.root.destroy()
 
 # testing core functions
@@ -1,94 +1,412 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Data files are paths relative to the working directory: import core from
+# a scratch directory, so neither loading nor saving data in the tests can
+# ever touch the real files
+_tmp_dir = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(_tmp_dir.name)
+
 import core
 from core import schedule_next_review, build_study_plan
-import unittest
+
+def tearDownModule():
+    core.flush_writes()
+    core.close_db()
+    os.chdir(_cwd)
+    _tmp_dir.cleanup()
+
+def _set_vocab(**entries):
+    """Replace the whole vocabulary with entries, a test's starting words."""
+    core.vocab.clear()
+    core.vocab.update(entries)
 
 
 class TestSpacedRepetition(unittest.TestCase):
-    def setUp(self):
-        core.vocab.clear()
     # Testing schedule_next_review
     def test_next_review(self):
-        core.vocab["test"] = {
+        _set_vocab(test={
             "ease": 2.5 ,
             "interval": 5,
             "box": 2
-        }
+        })
         schedule_next_review("test", rating = 1)
         self.assertEqual(core.vocab["test"]["interval"], 1)
     def test_next_review_easy(self):
-        core.vocab["test"] = {
+        _set_vocab(test={
             "ease": 2.5,
             "interval": 5,
             "box": 2
-        }
+        })
         schedule_next_review("test", rating = 4)
         self.assertGreater(core.vocab["test"]["interval"], 5)
     def test_lowering_interval(self):
-        core.vocab["test"] = {
+        _set_vocab(test={
             "ease": 2.5,
             "interval": 1,
             "box": 2
-        }
+        })
         schedule_next_review("test", rating = 4)
         self.assertEqual(core.vocab["test"]["interval"], 3)
     def test_low_ease_prioritized(self):
-        core.vocab["test"] = {
+        _set_vocab(test={
             "ease": 2.5,
             "interval": 5,
             "box": 2
-        }
+        })
         schedule_next_review("test", rating = 1)
         self.assertGreater(core.vocab["test"]["ease"], 1.3)
+    def test_schedule_batch_matches_single(self):
+        _set_vocab(
+            a={"ease": 2.5, "interval": 5, "box": 2},
+            b={"ease": 2.5, "interval": 5, "box": 2}
+        )
+        schedule_next_review("a", rating = 3)
+        core.schedule_batch([("b", 3), ("missing", 1)])
+        self.assertEqual(core.vocab["a"], core.vocab["b"])
 
 #testing build_study_plan()
     def test_overdue(self):
-        core.vocab["past"] = {
-            "next_review": "2000-09-01",
-            "ease": 2.5,
-            "times_reviewed": 5,
-            "times_correct": 5,
-            "history": []
-        }
-
-        core.vocab["future"] = {
-            "next_review": "2099-09-01",
-            "ease": 2.5,
-            "times_reviewed": 5,
-            "times_correct": 5,
-            "history": []
-        }
+        _set_vocab(
+            past={
+                "next_review": "2000-09-01",
+                "ease": 2.5,
+                "times_reviewed": 5,
+                "times_correct": 5,
+                "history": []
+            },
+            future={
+                "next_review": "2099-09-01",
+                "ease": 2.5,
+                "times_reviewed": 5,
+                "times_correct": 5,
+                "history": []
+            }
+        )
 
         plan = core.build_study_plan(1)
         self.assertEqual(plan[0], "past")
 
     def test_new_words(self):
-        core.vocab["new"] = {
+        _set_vocab(new={
             "next_review": "2099-09-01",
             "ease": 2.5,
             "times_reviewed": 0,
             "history": []
-        }
+        })
         plan = core.build_study_plan(1)
         self.assertEqual(plan[0], "new")
     def test_low_accuracy_prioritized(self):
-        core.vocab["hard"] = {
-            "times_reviewed": 10,
-            "times_correct": 2,
-            "next_review": "2099-01-01",
-            "ease": 2.5,
-            "history": []
-        }
-
-        core.vocab["easy"] = {
-            "times_reviewed": 10,
-            "times_correct": 10,
-            "next_review": "2099-01-01",
-            "ease": 2.5,
-            "history": []
-        }
+        _set_vocab(
+            hard={
+                "times_reviewed": 10,
+                "times_correct": 2,
+                "next_review": "2099-01-01",
+                "ease": 2.5,
+                "history": []
+            },
+            easy={
+                "times_reviewed": 10,
+                "times_correct": 10,
+                "next_review": "2099-01-01",
+                "ease": 2.5,
+                "history": []
+            }
+        )
 
         plan = core.build_study_plan(1)
 
         self.assertEqual(plan[0], "hard")
+
+#testing get_due_words()
+    def test_due_words_follow_schedule(self):
+        _set_vocab(
+            due={"next_review": "2000-01-01", "ease": 2.5, "interval": 1, "box": 1},
+            later={"next_review": "2099-01-01"}
+        )
+        self.assertEqual(core.get_due_words(), ["due"])
+        schedule_next_review("due", rating = 3)
+        self.assertEqual(core.get_due_count(), 0)
+    def test_due_index_patched_in_place(self):
+        _set_vocab(**{f"w{i}": {"next_review": day, "ease": 2.5, "interval": 1, "box": 1}
+                      for i, day in enumerate(["2000-01-03", "2000-01-01", "2000-01-02", "2099-01-01"])})
+        self.assertEqual(core.get_due_words(), ["w1", "w2", "w0"])
+        core.schedule_batch([("w1", 4), ("w0", 1)])
+        index = core._due_index
+        self.assertEqual(index["version"], core.vocab_version)
+        self.assertEqual(list(zip(index["dates"], index["words"])),
+                         sorted((d["next_review"], w) for w, d in core.vocab.items()))
+        self.assertEqual(core.get_due_words(), ["w2"])
+
+    def test_due_index_kept_across_word_edits(self):
+        _set_vocab(old={"next_review": "2000-01-01", "sentence": "an old word"})
+        self.assertEqual(core.get_due_count(), 1)
+        core.add_word_gui_logic("new", "a new word", "")
+        core.edit_word("old", "the old word", "")
+        core.remove_word("old")
+        index = core._due_index
+        self.assertEqual(index["version"], core.vocab_version)
+        self.assertEqual(index["words"], ["new"])
+        self.assertEqual(core.get_due_count(), 1)
+
+    def test_plan_reused_until_vocab_changes(self):
+        _set_vocab(a={"next_review": "2000-01-01"}, b={"next_review": "2000-01-05"})
+        plan = core.build_study_plan(2)
+        plan.clear()  # callers get their own copy
+        self.assertEqual(core.build_study_plan(2), ["a", "b"])
+        core.vocab["c"] = {"next_review": "1999-01-01"}
+        self.assertEqual(core.build_study_plan(2), ["c", "a"])
+
+    def test_plan_columns_patched_in_place(self):
+        _set_vocab(**{f"w{i}": {"next_review": day, "ease": 2.5, "interval": 1, "box": 1}
+                      for i, day in enumerate(["2000-01-03", "2000-01-01", "2099-01-01"])})
+        core.build_study_plan(3)
+        core.schedule_batch([("w1", 4), ("w0", 1)])
+        self.assertEqual(core._plan_columns["version"], core.vocab_version)
+        patched = core.build_study_plan(3)
+        core._plan_columns["version"] = None
+        core._plan_cache["key"] = None
+        self.assertEqual(patched, core.build_study_plan(3))
+
+
+class TestWordManagement(unittest.TestCase):
+    def setUp(self):
+        core.vocab.clear()
+
+    def test_duplicate_ignores_case(self):
+        self.assertTrue(core.add_word_gui_logic("Apple", "An apple a day", ""))
+        self.assertFalse(core.add_word_gui_logic("apple", "Another apple", ""))
+        self.assertEqual(core.vocab.find("APPLE"), "Apple")
+
+    def test_remove_word(self):
+        _set_vocab(first={"sentence": "the first word"}, Second={"sentence": "the second word"})
+        removed = core.stats.get("words_removed", 0)
+        self.assertTrue(core.remove_word("second"))
+        self.assertEqual(list(core.vocab), ["first"])
+        self.assertEqual(core.stats["words_removed"], removed + 1)
+        core.flush_writes()
+        self.assertEqual(core.load_stats()["words_removed"], removed + 1)
+        self.assertFalse(core.remove_word("missing"))
+
+    def test_blanked_sentence_stored(self):
+        core.add_word_gui_logic("c++", "I write C++ daily", "")
+        self.assertEqual(core.get_random_quiz_word(), ("c++", "I write _____ daily"))
+        core.edit_word("c++", "c++ is fast", "")
+        self.assertEqual(core.vocab["c++"]["blanked"], "_____ is fast")
+
+    def test_search_text_follows_edits(self):
+        core.add_word_gui_logic("Apple", "An Apple a day", "Fruit")
+        self.assertEqual(core.vocab.search_text("Apple"), "apple\0an apple a day\0fruit")
+        core.edit_word("Apple", "Green APPLE", "")
+        self.assertEqual(core.vocab.search_text("Apple"), "apple\0green apple\0")
+        core.edit_word("Apple", "x" * 50, "")
+        self.assertEqual(core.vocab.display_fields("Apple"), ("x" * 40 + "...", ""))
+
+
+class TestStatistics(unittest.TestCase):
+    def test_overall_accuracy_tracks_answers(self):
+        _set_vocab(
+            a={"times_reviewed": 3, "times_correct": 1},
+            b={"times_reviewed": 0, "times_correct": 0}
+        )
+        core.record_answer("b", True)
+        self.assertEqual(core.get_overall_accuracy(), 50.0)
+        del core.vocab["a"]
+        self.assertEqual(core.get_overall_accuracy(), 100.0)
+        self.assertEqual(core.vocab["b"]["history"][-1]["correct"], True)
+
+    def test_history_is_capped(self):
+        _set_vocab(a={"times_reviewed": 0, "times_correct": 0, "history": []})
+        for i in range(core.MAX_HISTORY + 5):
+            core.record_answer("a", i % 2 == 0)
+        self.assertEqual(len(core.vocab["a"]["history"]), core.MAX_HISTORY)
+        self.assertEqual(core.vocab["a"]["times_reviewed"], core.MAX_HISTORY + 5)
+
+    def test_aggregates_follow_vocab_changes(self):
+        _set_vocab(a={"box": 2, "times_reviewed": 3, "times_correct": 0})
+        self.assertEqual(core.get_box_distribution()[2], 1)
+        self.assertEqual(core.get_difficult_words(), [("a", 1.0)])
+        core.record_answer("a", True)
+        core.vocab["b"] = {"box": 2, "times_reviewed": 0, "times_correct": 0}
+        self.assertEqual(core.get_box_distribution()[2], 2)
+        self.assertEqual(core.get_difficult_words(), [("a", 0.75)])
+        stats = core.compute_all_stats()
+        self.assertEqual((stats.total_reviewed, stats.accuracy), (4, 25.0))
+        self.assertEqual(core.get_all_accuracies(), {"a": 25.0, "b": 0.0})
+        schedule_next_review("a", rating = 4)
+        self.assertEqual(core.get_box_distribution(), {1: 0, 2: 1, 3: 1, 4: 0, 5: 0})
+
+
+class TestAchievements(unittest.TestCase):
+    def setUp(self):
+        core.vocab.clear()
+        core.progress.update(xp=0, current_streak=0, total_reviews=0, achievements=set())
+
+    def test_unlocks_each_tier_once(self):
+        core.progress["xp"] = 600
+        core.progress["current_streak"] = 3
+        self.assertEqual(core.check_achievements(),
+                         ["Earned 100 XP", "Earned 500 XP", "3-day study streak"])
+        self.assertEqual(core.check_achievements(), [])
+        self.assertEqual(core.load_progress()["achievements"], {"XP_100", "XP_500", "Streak_3"})
+
+
+class TestBatchedWrites(unittest.TestCase):
+    def setUp(self):
+        core.vocab.clear()
+        core.close_db()
+        for path in (core.DB_FILE, core.DB_FILE + "-wal", core.DB_FILE + "-shm", core.STATS_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_deferred_until_batch_exit(self):
+        with core.batched_writes():
+            core.vocab["test"] = {"ease": 2.5, "interval": 1, "box": 1}
+            schedule_next_review("test", rating = 3)
+            core.save_vocab()
+            self.assertFalse(os.path.exists(core.DB_FILE))
+        self.assertTrue(os.path.exists(core.DB_FILE))
+
+    def test_nested_batches_flush_once(self):
+        with core.batched_writes():
+            with core.batched_writes():
+                core.save_stats()
+            self.assertFalse(os.path.exists(core.STATS_FILE))
+        self.assertTrue(os.path.exists(core.STATS_FILE))
+
+    def test_write_leaves_no_temp_files(self):
+        core.stats["words_added"] = 3
+        core.save_stats()
+        self.assertFalse([f for f in os.listdir(_tmp_dir.name) if f.endswith(".tmp")])
+        self.assertEqual(core.load_stats()["words_added"], 3)
+
+    @unittest.skipIf(os.name == "nt", "POSIX permission bits")
+    def test_write_keeps_file_mode(self):
+        core.save_stats()
+        os.chmod(core.STATS_FILE, 0o644)
+        core.save_stats()
+        self.assertEqual(os.stat(core.STATS_FILE).st_mode & 0o777, 0o644)
+
+    def test_vocab_round_trips_through_database(self):
+        core.add_word_gui_logic("apple", "An apple a day", "fruit")
+        core.add_word_gui_logic("pear", "A ripe pear", "")
+        core.record_answer("apple", False)
+        del core.vocab["pear"]
+        core.save_vocab()
+        loaded = core.load_vocab()
+        self.assertEqual(list(loaded), ["apple"])
+        self.assertEqual(loaded["apple"]["note"], "fruit")
+        self.assertEqual(loaded["apple"]["history"][0]["correct"], False)
+        self.assertEqual(loaded.total_reviewed, 1)
+
+    def test_failed_save_is_retried(self):
+        core.add_word_gui_logic("apple", "An apple a day", "")
+        locked = sqlite3.OperationalError("database is locked")
+        with mock.patch.object(core, "_pack_history", side_effect=locked):
+            with self.assertRaises(sqlite3.OperationalError):
+                core.add_word_gui_logic("pear", "A ripe pear", "")
+        core.flush_writes()
+        self.assertEqual(sorted(core.load_vocab()), ["apple", "pear"])
+
+    def test_interrupted_json_import_retried(self):
+        core._write_json(core.FILE_NAME, {"w": {"sentence": "a w", "history": [{"date": "01/02/2024"}]}})
+        self.addCleanup(os.remove, core.FILE_NAME)
+        with mock.patch.object(core, "vocab", core.load_vocab()):
+            with self.assertRaises(ValueError):
+                core.upgrade_vocab_schema()
+        # The failed import left an empty database behind; the JSON still wins
+        self.assertTrue(os.path.exists(core.DB_FILE))
+        self.assertEqual(list(core.load_vocab()), ["w"])
+
+    def test_schema_upgrade_runs_once(self):
+        _set_vocab(old={"sentence": "an old word"})
+        core.vocab.schema_version = 1
+        core.upgrade_vocab_schema()
+        self.assertEqual(core.vocab["old"]["blanked"], "an _____ word")
+        self.assertEqual(core.load_vocab().schema_version, core.VOCAB_SCHEMA_VERSION)
+
+    def make_v3_database(self, extra_sql: str = "") -> None:
+        """Create a version 3 database, history still in a reviews table."""
+        conn = sqlite3.connect(core.DB_FILE)
+        conn.executescript("""
+            CREATE TABLE words (word TEXT PRIMARY KEY, sentence TEXT NOT NULL, note TEXT NOT NULL,
+                blanked TEXT NOT NULL, box INTEGER NOT NULL, times_reviewed INTEGER NOT NULL,
+                times_correct INTEGER NOT NULL, ease REAL NOT NULL, last_reviewed TEXT,
+                next_review TEXT, interval INTEGER NOT NULL);
+            CREATE TABLE reviews (id INTEGER PRIMARY KEY, word TEXT NOT NULL,
+                date TEXT NOT NULL, correct INTEGER NOT NULL);
+            INSERT INTO words VALUES ('a', 's', '', 's', 1, 2, 1, 2.5, NULL, '2024-01-02', 1);
+            INSERT INTO reviews (word, date, correct) VALUES ('a', '2024-01-01', 0), ('a', '2024-01-02', 1);
+            PRAGMA user_version = 3;
+        """ + extra_sql)
+        conn.close()
+
+    def test_reviews_table_migrated(self):
+        self.make_v3_database()
+        loaded = core.load_vocab()
+        self.assertEqual(loaded["a"]["history"], [{"date": "2024-01-01", "correct": False},
+                                                  {"date": "2024-01-02", "correct": True}])
+        self.assertEqual(loaded.schema_version, core.VOCAB_SCHEMA_VERSION)
+        self.assertEqual(core.load_vocab()["a"]["history"], loaded["a"]["history"])
+
+    def test_interrupted_migration_leaves_version_3(self):
+        # The trigger fails the migration after its columns were added
+        self.make_v3_database(
+            "CREATE TRIGGER stop BEFORE UPDATE ON words BEGIN SELECT RAISE(ABORT, 'interrupted'); END;"
+        )
+        with self.assertRaises(sqlite3.IntegrityError):
+            core.load_vocab()
+        conn = core._connect()
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 3)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(words)")]
+        self.assertNotIn("history_days", columns)
+        conn.execute("DROP TRIGGER stop")
+        self.assertEqual(len(core.load_vocab()["a"]["history"]), 2)
+
+    def test_partly_migrated_database_loads(self):
+        # Columns left behind by a migration that was not transactional
+        self.make_v3_database(
+            "ALTER TABLE words ADD COLUMN history_days BLOB NOT NULL DEFAULT x'';"
+        )
+        self.assertEqual(len(core.load_vocab()["a"]["history"]), 2)
+
+    def test_review_log_replayed(self):
+        _set_vocab(a={"ease": 2.5, "interval": 1, "box": 1, "times_reviewed": 0, "times_correct": 0})
+        core.log_review("a", True, 3, "2024-01-01")
+        with open(core.REVIEW_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write("2024-01-01\t1\t4\ta")  # torn by a crash
+        self.assertEqual(core.replay_review_log(), 1)
+        self.assertEqual(core.vocab["a"]["times_correct"], 1)
+        self.assertEqual(core.vocab["a"]["history"], [{"date": "2024-01-01", "correct": True}])
+        self.assertEqual(core.vocab["a"]["interval"], 3)
+        self.assertFalse(os.path.exists(core.REVIEW_LOG_FILE))
+
+    def test_exit_during_session_saves_answers_once(self):
+        # A session interrupted by Ctrl+C: atexit still flushes its batch
+        script = (
+            "import core\n"
+            "core.add_word_gui_logic('a', 'an a', '')\n"
+            "batch = core.batched_writes()\n"
+            "batch.__enter__()\n"
+            "core.record_answer('a', True, '2024-01-01')\n"
+            "core.log_review('a', True, 3, '2024-01-01')\n"
+            "raise KeyboardInterrupt\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True)
+        self.assertNotEqual(result.returncode, 0)
+        with mock.patch.object(core, "vocab", core.load_vocab()):
+            self.assertEqual(core.vocab["a"]["times_reviewed"], 1)
+            self.assertEqual(core.replay_review_log(), 0)
+            self.assertEqual(core.vocab["a"]["times_reviewed"], 1)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file